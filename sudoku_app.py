@@ -16,6 +16,7 @@ from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtWidgets import QScrollArea
 
+from sudoku_engine import CancelToken
 from sudoku_solver import SudokuSolver
 
 
@@ -24,10 +25,19 @@ class SolverThread(QThread):
     progress = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
     
+    # Предел времени поиска: неверно распознанная доска может не иметь
+    # решения, которое при этом трудно опровергнуть
+    TIMEOUT = 30.0
+    
     def __init__(self, image_path):
         super().__init__()
         self.image_path = image_path
-        self.solver = SudokuSolver()
+        self.solver = SudokuSolver(timeout=self.TIMEOUT)
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """Просит поток остановить поиск (безопасно вызывать из UI)"""
+        self.cancel_token.cancel()
     
     def run(self):
         try:
@@ -44,9 +54,15 @@ class SolverThread(QThread):
                 return
             
             self.progress.emit("🔄 Решаю судоку...")
-            if self.solver.solve():
+            solved = self.solver.solve(cancel=self.cancel_token)
+            if solved:
                 self.progress.emit("✅ Решено!")
                 self.finished.emit(True, self._format_result())
+            elif solved is None:
+                stats = self.solver.get_statistics()
+                reason = "отменено" if stats["abort_reason"] == "cancelled" else "превышен предел времени"
+                self.finished.emit(False, f"⏹ Решение прервано: {reason} "
+                                          f"({stats['nodes']} узлов, {stats['time']:.1f} с)")
             else:
                 self.finished.emit(False, "❌ Решение не найдено")
         
@@ -79,6 +95,7 @@ class SudokuApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.solver = None
+        self.solver_thread = None
         self.current_image = None
         self.init_ui()
     
@@ -146,6 +163,12 @@ class SudokuApp(QMainWindow):
         btn_solve.setMinimumHeight(50)
         left_layout.addWidget(btn_solve)
         
+        self.btn_stop = QPushButton("⏹ Остановить")
+        self.btn_stop.clicked.connect(self.stop_solving)
+        self.btn_stop.setEnabled(False)
+        self.btn_stop.setMinimumHeight(35)
+        left_layout.addWidget(self.btn_stop)
+        
         # Прогресс
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -273,8 +296,22 @@ MIT License - свободен в использовании и модифика
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.status_label.setText("⏳ Решаю...")
+        self.btn_stop.setEnabled(True)
         self.solver_thread.start()
     
+    def stop_solving(self):
+        """Остановить текущее решение"""
+        if self.solver_thread is not None and self.solver_thread.isRunning():
+            self.solver_thread.cancel()
+            self.status_label.setText("⏹ Останавливаю...")
+    
+    def closeEvent(self, event):
+        """Не оставлять поток решения работать после закрытия окна"""
+        if self.solver_thread is not None and self.solver_thread.isRunning():
+            self.solver_thread.cancel()
+            self.solver_thread.wait()
+        super().closeEvent(event)
+    
     def update_status(self, message):
         """Обновить статус"""
         self.status_label.setText(message)
@@ -282,6 +319,7 @@ MIT License - свободен в использовании и модифика
     def on_solve_finished(self, success, message):
         """Завершение решения"""
         self.progress_bar.setVisible(False)
+        self.btn_stop.setEnabled(False)
         self.result_text.setText(message)
         
         if success:
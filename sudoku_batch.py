@@ -0,0 +1,263 @@
+"""
+Пакетная обработка Судоку на нескольких процессах
+
+- iter_solve / solve_many: решение потока головоломок
+- recognize_many: распознавание папки изображений
+
+Задачи раздаются процессам ProcessPoolExecutor; число задач в работе
+ограничено, поэтому входной поток читается лениво.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from sudoku_board import Board
+from sudoku_cache import SolutionCache
+from sudoku_solver import SudokuSolver
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+# Кэши решений процесса по размеру (см. _solve_chunk)
+_solution_caches = {}
+
+
+def _solve_chunk(chunk, options):
+    """
+    Решает порцию головоломок в одном процессе
+
+    Args:
+        chunk: список пар (index, puzzle)
+        options: параметры конструктора SudokuSolver
+
+    Returns:
+        список словарей со статистикой по каждой головоломке
+    """
+    # Кэш решений, заданный размером, общий для всех порций процесса
+    size = options.get("solution_cache")
+    if isinstance(size, int):
+        if size not in _solution_caches:
+            _solution_caches[size] = SolutionCache(size)
+        options = dict(options, solution_cache=_solution_caches[size])
+
+    # Один решатель на порцию: конструктор вызывает gc.collect()
+    solver = SudokuSolver(**options)
+    results = []
+    for index, puzzle in chunk:
+        start = time.perf_counter()
+        try:
+            board = Board(puzzle)
+            solver.board = board
+            solver.solution_steps = 0
+            solved = solver.solve()
+        except ValueError as e:
+            # Некорректная строка не должна останавливать весь поток:
+            # она становится записью с ошибкой, как нераспознанное изображение
+            results.append({
+                "index": index,
+                "solved": False,
+                "solution": None,
+                "steps": 0,
+                "time": time.perf_counter() - start,
+                "status": "invalid",
+                "abort_reason": None,
+                "error": str(e),
+            })
+            continue
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "index": index,
+            "solved": solved,
+            "solution": board if solved else None,
+            "steps": solver.solution_steps,
+            "time": elapsed,
+            "status": solver.status,
+            "abort_reason": solver.abort_reason,
+            "error": None,
+        })
+    return results
+
+
+def _chunks(puzzles, chunksize):
+    """Нарезает поток головоломок на порции пар (index, puzzle)"""
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_solve(puzzles, workers=None, ordered=True, chunksize=64, **options):
+    """
+    Решает поток головоломок на пуле процессов (генератор)
+
+    Args:
+        puzzles: итерируемый набор головоломок — строки из N² символов
+            (81 для 9x9) или матрицы N×N
+        workers: число процессов (None — по числу ядер, 1 — без пула)
+        ordered: True — результаты в порядке входа, False — по мере готовности
+        chunksize: размер порции, отправляемой процессу за раз
+        **options: параметры SudokuSolver (engine, propagation,
+            solution_cache — размер кэша решений, общего для порций процесса,
+            timeout и max_nodes — пределы на одну головоломку)
+
+    Yields:
+        словари {index, solved, solution, steps, time, status, abort_reason,
+        error}; solved — None, если поиск прерван по пределу; для
+        некорректной головоломки solved=False, status="invalid", а error —
+        текст ошибки разбора
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = _chunks(puzzles, chunksize)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _solve_chunk(chunk, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in _bounded_map(pool, _solve_chunk, chunks, workers * 4,
+                                    ordered, options):
+            yield from results
+
+
+def _bounded_map(pool, fn, items, max_pending, ordered, *args):
+    """
+    Аналог pool.map с ограниченной очередью: в работе и в буфере
+    упорядочивания одновременно не больше max_pending задач
+
+    Args:
+        pool: исполнитель (Executor)
+        fn: функция fn(item, *args), выполняемая в пуле
+        items: итерируемые задачи (читаются лениво)
+        max_pending: предел задач в работе
+        ordered: True — результаты в порядке items, False — по готовности
+    """
+    items = iter(items)
+    # Задачи в работе и готовые, но ещё не отданные по порядку
+    pending = {}
+    finished = {}
+    submitted = 0
+    next_seq = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) + len(finished) < max_pending:
+            item = next(items, None)
+            if item is None:
+                exhausted = True
+                break
+            pending[pool.submit(fn, item, *args)] = submitted
+            submitted += 1
+
+        if not pending:
+            break
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            seq = pending.pop(future)
+            if ordered:
+                finished[seq] = future.result()
+            else:
+                yield future.result()
+
+        while next_seq in finished:
+            yield finished.pop(next_seq)
+            next_seq += 1
+
+
+def solve_many(puzzles, workers=None, chunksize=64, **options):
+    """
+    Решает набор головоломок параллельно
+
+    Args:
+        puzzles: головоломки — строки из N² символов или матрицы N×N
+        workers: число процессов (None — по числу ядер)
+        chunksize: размер порции, отправляемой процессу за раз
+        **options: параметры SudokuSolver (engine, propagation, timeout, max_nodes)
+
+    Returns:
+        список результатов в порядке входа
+    """
+    return list(iter_solve(puzzles, workers, True, chunksize, **options))
+
+
+def find_images(source):
+    """
+    Раскрывает источник изображений в отсортированный список путей
+
+    Args:
+        source: папка, glob-шаблон или список путей
+    """
+    if isinstance(source, (list, tuple)):
+        return [str(path) for path in source]
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    return sorted(glob.glob(source))
+
+
+def _recognize_image(path, options):
+    """
+    Распознаёт одно изображение, замеряя время каждой стадии
+
+    Returns:
+        словарь {path, board, conflicts, unique, timings, cached, error};
+        unique — единственно ли решение доски без конфликтов (None —
+        доска с конфликтами или не хватило предела узлов)
+    """
+    record = {"path": path, "board": None, "conflicts": None, "unique": None,
+              "timings": {}, "cached": False, "error": None}
+    timings = record["timings"]
+    start = time.perf_counter()
+    try:
+        solver = SudokuSolver(**options)
+        board = solver.recognize(path, timings)
+        record["cached"] = solver.last_cached
+        record["board"] = board
+        record["conflicts"] = solver.find_conflicts(board)
+        if not record["conflicts"]:
+            record["unique"] = solver.is_unique(board, solver.UNIQUENESS_MAX_NODES)
+    except Exception as e:
+        record["error"] = str(e)
+    timings["total"] = time.perf_counter() - start
+    return record
+
+
+def recognize_many(source, workers=None, queue_size=None, ordered=False, **options):
+    """
+    Распознаёт много изображений параллельно (генератор).
+    Чтение, предобработка и OCR каждого изображения выполняются
+    в отдельном процессе; записи выдаются по мере готовности.
+
+    Args:
+        source: папка, glob-шаблон или список путей к изображениям
+        workers: число процессов (None — по числу ядер, 1 — без пула)
+        queue_size: предел изображений в работе (по умолчанию 2 x workers)
+        ordered: True — записи в порядке путей
+        **options: параметры SudokuSolver
+
+    Yields:
+        словари {path, board, conflicts, unique, timings, cached, error}; timings
+        содержит время стадий decode, preprocess, ocr и total в секундах
+        (при попадании в кэш — только decode и total)
+    """
+    paths = find_images(source)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for path in paths:
+            yield _recognize_image(path, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _bounded_map(pool, _recognize_image, paths,
+                                queue_size or workers * 2, ordered, options)
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк движков решения на стандартных наборах головоломок
+
+Наборы (CORPORA):
+- easy, expert — генерируются sudoku_generator с фиксированным зерном,
+  поэтому при каждом запуске одинаковы; в expert остаются только
+  головоломки, которым решателю по умолчанию нужно не меньше
+  EXPERT_MIN_NODES узлов поиска (большинство сгенерированных «expert»
+  решаются одной-двумя догадками)
+- top — начало классического набора top95 и известные «самые сложные»
+  головоломки (Inkala, Easter Monster)
+- 17clue — головоломки с минимальными 17 подсказками из перечня Ройла
+Свои наборы подключаются через --corpus (файл в формате --batch).
+
+Каждый набор решается каждой конфигурацией решателя (CONFIGURATIONS).
+Считаются головоломки в секунду, задержки p50/p95/p99, узлы поиска
+на головоломку и пиковая память (tracemalloc, отдельным проходом,
+чтобы трассировка не искажала время). Результаты пишутся в JSON;
+с --baseline они сравниваются с сохранённым прогоном. Код выхода 1
+всегда даёт рост узлов поиска: они детерминированы. Время между двумя
+одинаковыми прогонами гуляет на десятки процентов, поэтому изменения
+скорости и задержек по умолчанию только печатаются; с --time-tolerance
+регрессией считается и падение головоломок в секунду или рост p95
+больше заданной доли.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from sudoku_board import Board
+from sudoku_io import open_output, read_puzzles
+from sudoku_solver import SudokuSolver
+
+# Начало набора top95 (первые 10 — головоломки с 17 подсказками)
+# и известные сложные головоломки
+TOP_PUZZLES = (
+    "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+    "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+    "48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....",
+    "....14....3....2...7..........9...3.6.1.............8.2.....1.4....5.6.....7.8...",
+    "......52..8.4......3...9...5.1...6..2..7........3.....6...1..........7.4.......3.",
+    "6.2.5.........3.4..........43...8....1....2........7..5..27...........81...6.....",
+    ".524.........7.1..............8.2...3.....6...9.5.....1.6.3...........897........",
+    "6.2.5.........4.3..........43...8....1....2........7..5..27...........81...6.....",
+    ".923.........8.1...........1.7.4...........658.........6.5.2...4.....7.....9.....",
+    "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    "..53.....8......2..7..1.5..4....53...1..7...6..32...8..6.5....9..4....3......97..",
+    "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    "85...24..72......9..4.........1.7..23.5...9...4...........8..7..17..........36.4.",
+    "12.3....435....1....4........54..2..6...7.........8.9...31..5.......9.7.....6...8",
+    "1.......2.9.4...5...6...7...5.3.4.......6........58.4...2...6...3...9.8.7.......1",
+)
+
+# Головоломки с 17 подсказками (минимум для единственного решения)
+SEVENTEEN_CLUE_PUZZLES = (
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "000000010400000000020000000000050604008000300001090000300400200050100000000807000",
+    "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+    "000000012003600000000007000410020000000500300700000600280000040000300500000000000",
+    "000000012008030000000000040120500000000004700060000000507000300000620000000100000",
+    "000000012040050000000009000070600400000100000000000050000087500601000300200000000",
+    "000000012050400000000000030700600400001000000000080000920000800000510700000003000",
+    "000000012300000060000040000900000500000001070020000000000350400001400800060000000",
+    "000000012400090000000000050070200000600000400000108000018000000000030700502000000",
+    "000000012500008000000700000600120000700000450000030000030000800000500700020000000",
+)
+
+# Конфигурации решателя: параметры SudokuSolver
+CONFIGURATIONS = {
+    "backtrack": {"engine": "backtrack"},
+    "backtrack-singles": {"engine": "backtrack",
+                          "propagation": ("naked_singles", "hidden_singles")},
+    "backtrack-plain": {"engine": "backtrack", "propagation": None},
+    "dlx": {"engine": "dlx"},
+}
+
+# Зерно генерируемых наборов: одинаковые наборы при каждом запуске
+SEED = 2024
+
+# Сколько узлов поиска решателя по умолчанию нужно головоломке набора expert
+EXPERT_MIN_NODES = 5
+
+# Допустимый рост узлов поиска относительно базового прогона: узлы
+# детерминированы, поэтому по умолчанию регрессия — любой рост
+TOLERANCE = 0.0
+
+# Метрики времени и направление, в котором изменение — замедление
+# (1 — рост плох, -1 — падение плохо)
+TIME_METRICS = {"puzzles_per_sec": -1, "latency_p95": 1}
+
+
+def _generated(difficulty, min_nodes=0):
+    """
+    Набор, который строит sudoku_generator с фиксированным зерном;
+    min_nodes — сколько узлов поиска решателя по умолчанию должна
+    требовать головоломка, чтобы попасть в набор
+    """
+    def build(count):
+        from sudoku_generator import generate_many
+        solver = SudokuSolver()
+        puzzles = []
+        # Генератор ленивый: берём головоломки, пока не наберётся count
+        for record in generate_many(count * 50, workers=1, seed=f"{SEED}-{difficulty}",
+                                    difficulty=difficulty):
+            if min_nodes:
+                solver.solve(Board(record["puzzle"]))
+                if solver.last_nodes < min_nodes:
+                    continue
+            puzzles.append(record["puzzle"].to_string())
+            if len(puzzles) == count:
+                break
+        return puzzles
+    return build
+
+
+# Наборы: функция count -> список строк головоломок (count — размер
+# генерируемых наборов, встроенные наборы берутся целиком)
+CORPORA = {
+    "easy": _generated("easy"),
+    "expert": _generated("expert", EXPERT_MIN_NODES),
+    "top": lambda count: list(TOP_PUZZLES),
+    "17clue": lambda count: list(SEVENTEEN_CLUE_PUZZLES),
+}
+
+
+def percentile(values, q):
+    """Процентиль q (0-100) по ближайшему рангу; для пустого списка — None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def validate(puzzles):
+    """
+    Проверяет, что у каждой головоломки ровно одно решение
+
+    Returns:
+        номера головоломок с другим числом решений
+    """
+    solver = SudokuSolver()
+    return [i for i, puzzle in enumerate(puzzles)
+            if solver.count_solutions(Board(puzzle), limit=2) != 1]
+
+
+def _correct(puzzle, board, solver):
+    """Решение заполнено, без конфликтов и сохраняет подсказки"""
+    return (all(board.cells) and not solver.find_conflicts(board)
+            and all(not given or given == num for given, num in zip(puzzle.cells, board.cells)))
+
+
+def run_config(puzzles, options, repeat=1, timeout=None):
+    """
+    Решает набор одной конфигурацией решателя
+
+    Args:
+        puzzles: список строк головоломок
+        options: параметры SudokuSolver
+        repeat: сколько раз решать каждую головоломку (задержка — лучшая)
+        timeout: предел времени на головоломку в секундах
+
+    Returns:
+        словарь с метриками (см. модуль)
+    """
+    solver = SudokuSolver(**options)
+    boards = [Board(puzzle) for puzzle in puzzles]
+    latencies, nodes = [], []
+    solved = aborted = wrong = 0
+
+    for puzzle in boards:
+        best = None
+        for _ in range(repeat):
+            board = Board(puzzle)
+            start = time.perf_counter()
+            result = solver.solve(board, timeout=timeout)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+        nodes.append(solver.last_nodes)
+        if result:
+            solved += 1
+            if not _correct(puzzle, board, solver):
+                wrong += 1
+        elif result is None:
+            aborted += 1
+
+    # Пиковая память — отдельным проходом: tracemalloc замедляет решение
+    peak = 0
+    tracemalloc.start()
+    try:
+        for puzzle in boards:
+            tracemalloc.reset_peak()
+            solver.solve(Board(puzzle), timeout=timeout)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "puzzles": len(boards),
+        "solved": solved,
+        "aborted": aborted,
+        "wrong": wrong,
+        "total_time": total,
+        "puzzles_per_sec": len(boards) / total if total else None,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=None),
+        },
+        "nodes": {
+            "mean": sum(nodes) / len(nodes) if nodes else None,
+            "p50": percentile(nodes, 50),
+            "max": max(nodes, default=None),
+        },
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE, time_tolerance=None):
+    """
+    Сравнивает прогон с базовым по общим парам (набор, конфигурация)
+
+    Args:
+        results, baseline: словари результатов, как в JSON прогона
+        tolerance: допустимый рост узлов поиска в среднем (доля)
+        time_tolerance: допустимое замедление (доля) — падение головоломок
+            в секунду или рост p95; None — время не проверяется
+
+    Returns:
+        (регрессии, изменения времени): регрессии — рост узлов больше
+        tolerance и замедления больше time_tolerance; изменения времени —
+        остальные изменения скорости и p95, для сведения. Элементы —
+        словари {corpus, config, metric, baseline, current, change}
+    """
+    base = {(r["corpus"], r["config"]): r for r in baseline["results"]}
+    metrics = (
+        ("nodes_mean", lambda r: r["nodes"]["mean"]),
+        ("puzzles_per_sec", lambda r: r["puzzles_per_sec"]),
+        ("latency_p95", lambda r: r["latency"]["p95"]),
+    )
+    regressions, timings = [], []
+    for result in results["results"]:
+        old = base.get((result["corpus"], result["config"]))
+        if old is None:
+            continue
+        for metric, get in metrics:
+            before, after = get(old), get(result)
+            if not before or after is None:
+                continue
+            change = {
+                "corpus": result["corpus"], "config": result["config"], "metric": metric,
+                "baseline": before, "current": after, "change": after / before - 1,
+            }
+            if metric == "nodes_mean":
+                limit, growth = tolerance, change["change"]
+            else:
+                limit, growth = time_tolerance, change["change"] * TIME_METRICS[metric]
+            if limit is not None and growth > limit:
+                regressions.append(change)
+            elif metric != "nodes_mean":
+                timings.append(change)
+    return regressions, timings
+
+
+def _load_corpora(names, files, count):
+    """Словарь имя -> головоломки: встроенные наборы и файлы --corpus"""
+    corpora = {}
+    for name in names:
+        if name not in CORPORA:
+            raise ValueError(f"Неизвестный набор: {name}")
+        corpora[name] = CORPORA[name](count)
+    for path in files:
+        corpora[Path(path).name.split('.')[0]] = list(read_puzzles(path))
+    return corpora
+
+
+def main():
+    """Бенчмарк из командной строки"""
+    parser = argparse.ArgumentParser(description='Sudoku solver benchmark')
+    parser.add_argument('--corpora', default=','.join(CORPORA),
+                        help=f"Встроенные наборы через запятую (по умолчанию {','.join(CORPORA)})")
+    parser.add_argument('--corpus', action='append', default=[], metavar='FILE',
+                        help='Дополнительный набор из файла (можно несколько раз)')
+    parser.add_argument('--configs', default=','.join(CONFIGURATIONS),
+                        help=f"Конфигурации через запятую (по умолчанию {','.join(CONFIGURATIONS)})")
+    parser.add_argument('-n', '--count', type=int, default=50,
+                        help='Размер генерируемых наборов (easy, expert)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Сколько раз решать каждую головоломку (берётся лучшее время)')
+    parser.add_argument('--timeout', type=float, default=10.0, metavar='SEC',
+                        help='Предел времени на одну головоломку')
+    parser.add_argument('--validate', action='store_true',
+                        help='Проверить единственность решения головоломок наборов')
+    parser.add_argument('--baseline', default=None, metavar='FILE',
+                        help='JSON прошлого прогона для сравнения (код выхода 1 при росте узлов)')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Допустимый рост узлов поиска относительно базового прогона (доля)')
+    parser.add_argument('--time-tolerance', type=float, default=None, metavar='FRACTION',
+                        help='Допустимое замедление относительно базового прогона (доля, '
+                             'например 0.5): падение гол/с или рост p95 больше него дают '
+                             'код выхода 1 (по умолчанию время только печатается)')
+    parser.add_argument('-o', '--output', default='-',
+                        help="Куда писать JSON с результатами ('-' — stdout)")
+    args = parser.parse_args()
+
+    log = sys.stderr
+    configs = [name for name in args.configs.split(',') if name]
+    unknown = [name for name in configs if name not in CONFIGURATIONS]
+    if unknown:
+        parser.error(f"Неизвестные конфигурации: {', '.join(unknown)}")
+    try:
+        corpora = _load_corpora([name for name in args.corpora.split(',') if name],
+                                args.corpus, args.count)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"\n⏱ Бенчмарк: наборы {', '.join(f'{name} ({len(puzzles)})' for name, puzzles in corpora.items())}; "
+          f"конфигурации {', '.join(configs)}", file=log)
+
+    if args.validate:
+        for name, puzzles in corpora.items():
+            bad = validate(puzzles)
+            if bad:
+                print(f"❌ {name}: не единственное решение у головоломок {bad}", file=log)
+                sys.exit(1)
+        print("✓ У всех головоломок единственное решение", file=log)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "timeout": args.timeout,
+        },
+        "results": [],
+    }
+    print(f"{'набор':<10} {'конфигурация':<18} {'гол/с':>9} {'p50 мс':>8} {'p95 мс':>8} "
+          f"{'p99 мс':>8} {'узлы':>9} {'память КБ':>10}", file=log)
+    for name, puzzles in corpora.items():
+        for config in configs:
+            metrics = run_config(puzzles, CONFIGURATIONS[config], args.repeat, args.timeout)
+            results["results"].append({"corpus": name, "config": config, **metrics})
+            latency = metrics["latency"]
+            print(f"{name:<10} {config:<18} {metrics['puzzles_per_sec'] or 0:>9.1f} "
+                  f"{(latency['p50'] or 0) * 1000:>8.2f} {(latency['p95'] or 0) * 1000:>8.2f} "
+                  f"{(latency['p99'] or 0) * 1000:>8.2f} {metrics['nodes']['mean'] or 0:>9.1f} "
+                  f"{metrics['peak_memory_kb']:>10.1f}", file=log)
+            if metrics["aborted"] or metrics["wrong"]:
+                print(f"   ⚠ прервано: {metrics['aborted']}, неверных решений: {metrics['wrong']}",
+                      file=log)
+
+    with open_output(args.output) as out:
+        json.dump(results, out, indent=2)
+        out.write('\n')
+
+    wrong = sum(r["wrong"] for r in results["results"])
+    if wrong:
+        print(f"❌ Неверных решений: {wrong}", file=log)
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions, timings = compare(results, baseline, args.tolerance, args.time_tolerance)
+        if timings:
+            print(f"\nℹ Время относительно {args.baseline} (для сведения):", file=log)
+            for r in timings:
+                print(f"   • {r['corpus']}/{r['config']} {r['metric']}: "
+                      f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%})", file=log)
+        if regressions:
+            limits = f"допуск узлов {args.tolerance:.0%}"
+            if args.time_tolerance is not None:
+                limits += f", времени {args.time_tolerance:.0%}"
+            print(f"\n⚠ Регрессии относительно {args.baseline} ({limits}):", file=log)
+            for r in regressions:
+                print(f"   • {r['corpus']}/{r['config']} {r['metric']}: "
+                      f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%})", file=log)
+            sys.exit(1)
+        checked = "Узлы поиска и время" if args.time_tolerance is not None else "Узлы поиска"
+        print(f"\n✅ {checked} без регрессий относительно {args.baseline}", file=log)
+
+
+if __name__ == "__main__":
+    main()
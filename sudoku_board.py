@@ -0,0 +1,161 @@
+"""
+Компактная доска Судоку
+
+Board хранит N² клеток (по строкам, 0 — пустая клетка) в bytearray
+и не держит отдельных объектов на строки и числа: копия — одно
+копирование байтов, сериализация — сами байты. Для совместимости
+с кодом, работающим с матрицей N×N, board[row] возвращает memoryview
+строки, поэтому board[row][col] читается и присваивается как раньше.
+По умолчанию доска 9x9; размеры 4, 16 и 25 — см. sudoku_geometry.
+"""
+
+from sudoku_geometry import SIZES, SYMBOLS, size_for_cells
+
+
+class Board:
+    """Доска N×N на bytearray из N² байт"""
+
+    __slots__ = ('cells', 'size')
+
+    def __init__(self, source=None, size=None):
+        """
+        Args:
+            source: None (пустая доска), Board, N² байт, строка из N²
+                символа (цифры из sudoku_geometry.SYMBOLS, '.' или '0' —
+                пустая клетка) или матрица N×N
+            size: сторона пустой доски (только при source=None, по умолчанию 9)
+        """
+        if source is None:
+            cells = bytearray((size or 9) ** 2)
+        elif isinstance(source, Board):
+            cells = bytearray(source.cells)
+        elif isinstance(source, str):
+            text = source.strip()
+            if len(text) not in _TEXT_LENGTHS:
+                raise ValueError(f"Ожидалось {' или '.join(map(str, _TEXT_LENGTHS))} символов, "
+                                 f"получено {len(text)}: {text[:20]}...")
+            if not text.isascii():
+                raise ValueError("Недопустимый символ в строке головоломки")
+            cells = bytearray(text.encode('ascii').translate(_FROM_TEXT))
+            if _INVALID in cells:
+                raise ValueError("Недопустимый символ в строке головоломки")
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            cells = bytearray(source)
+        else:
+            rows = list(source)
+            if any(len(row) != len(rows) for row in rows):
+                raise ValueError("Доска должна быть квадратной матрицей N×N")
+            cells = bytearray(num for row in rows for num in row)
+
+        size = size_for_cells(len(cells))
+        if max(cells) > size:
+            raise ValueError(f"Значения клеток должны быть от 0 до {size}")
+        self.cells = cells
+        self.size = size
+
+    # ---------- Совместимость с матрицей N×N ----------
+
+    def __getitem__(self, key):
+        """board[row] — memoryview строки, board[row, col] — значение клетки"""
+        size = self.size
+        if isinstance(key, tuple):
+            row, col = key
+            return self.cells[row * size + col]
+        if not -size <= key < size:
+            raise IndexError("Номер строки вне доски")
+        row = key % size
+        return memoryview(self.cells)[row * size:row * size + size]
+
+    def __setitem__(self, key, num):
+        """board[row, col] = num"""
+        row, col = key
+        self.cells[row * self.size + col] = num
+
+    def __iter__(self):
+        size = self.size
+        view = memoryview(self.cells)
+        for start in range(0, size * size, size):
+            yield view[start:start + size]
+
+    def __len__(self):
+        return self.size
+
+    def to_list(self):
+        """Возвращает матрицу N×N (список списков)"""
+        cells, size = self.cells, self.size
+        return [list(cells[start:start + size]) for start in range(0, size * size, size)]
+
+    # ---------- Копирование, сравнение, сериализация ----------
+
+    def copy(self):
+        return Board(self.cells)
+
+    __copy__ = copy
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __hash__(self):
+        # Доска изменяема: не меняйте её, пока она лежит в словаре или множестве
+        return hash(bytes(self.cells))
+
+    def __bytes__(self):
+        return bytes(self.cells)
+
+    def __getstate__(self):
+        return bytes(self.cells)
+
+    def __setstate__(self, state):
+        self.cells = bytearray(state)
+        self.size = size_for_cells(len(state))
+
+    def to_string(self, blank='.'):
+        """Строка из N² символов"""
+        text = self.cells.translate(_TO_TEXT).decode('ascii')
+        return text if blank == '0' else text.replace('0', blank)
+
+    def __str__(self):
+        return self.to_string()
+
+    def __repr__(self):
+        return f"Board('{self.to_string()}')"
+
+
+# Длины строк головоломок поддерживаемых размеров
+_TEXT_LENGTHS = tuple(size * size for size in SIZES)
+
+# Таблицы перевода между значениями клеток и символами: 0 — '0',
+# остальные — SYMBOLS; при чтении '.' тоже пустая клетка, буквы
+# любого регистра, неизвестные символы дают _INVALID
+_INVALID = 255
+_TO_TEXT = bytes.maketrans(bytes(range(len(SYMBOLS) + 1)), ('0' + SYMBOLS).encode('ascii'))
+_FROM_TEXT = bytearray([_INVALID] * 256)
+_FROM_TEXT[ord('.')] = _FROM_TEXT[ord('0')] = 0
+for _value, _symbol in enumerate(SYMBOLS, 1):
+    _FROM_TEXT[ord(_symbol)] = _FROM_TEXT[ord(_symbol.lower())] = _value
+_FROM_TEXT = bytes(_FROM_TEXT)
+del _value, _symbol
+
+
+def flat_cells(board):
+    """
+    N² значений клеток по строкам для Board или матрицы N×N.
+    Для Board возвращается сам bytearray без копирования.
+    """
+    if isinstance(board, Board):
+        return board.cells
+    return [num for row in board for num in row]
+
+
+def write_cells(board, cells):
+    """Записывает N² значений по строкам в Board или матрицу N×N (на месте)"""
+    if isinstance(board, Board):
+        board.cells[:] = bytes(cells)
+        return
+    size = len(board)
+    for row in range(size):
+        board[row][:] = cells[row * size:row * size + size]
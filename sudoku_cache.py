@@ -0,0 +1,401 @@
+"""
+Кэши решателя Судоку
+
+RecognitionCache — кэш распознавания изображений на диске.
+
+Кэш включается явно (SudokuSolver(cache=...) или --cache): по умолчанию
+каждое изображение распознаётся заново. Ключ — SHA-256 от содержимого
+файла и параметров конвейера, поэтому переименованный файл находится
+в кэше, а смена бэкенда OCR или версии конвейера даёт промах.
+
+Каждая запись — отдельный JSON-файл {board, confidences}. Время
+изменения файла обновляется при попадании, и при превышении
+предельного размера удаляются записи, которые дольше всего не читались
+(LRU). Запись атомарна (временный файл + os.replace), поэтому каталог
+можно делить между процессами.
+
+SolutionCache — кэш решений в памяти по канонической форме головоломки:
+головоломки, отличающиеся перестановкой цифр, строк внутри полос,
+полос, столбцов внутри стеков, стеков и транспонированием, попадают
+в одну запись (см. canonical_form). Точный повтор доски находится
+по её байтам, без канонизации.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from itertools import permutations, product
+from math import factorial
+from pathlib import Path
+
+from sudoku_board import Board, flat_cells
+
+# Меняется при изменении конвейера распознавания — старые записи
+# перестают совпадать по ключу
+PIPELINE_VERSION = 1
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'sudoku-solver' / 'recognition'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Предел числа перебираемых преобразований при канонизации
+CANONICAL_LIMIT = 256
+
+# Индексы клеток транспонированной доски
+_TRANSPOSED = [col * 9 + row for row in range(9) for col in range(9)]
+
+
+class RecognitionCache:
+    """Кэш распознанных досок с ограничением размера"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: каталог кэша (по умолчанию ~/.cache/sudoku-solver/recognition)
+            max_bytes: предельный суммарный размер записей в байтах
+        """
+        if max_bytes <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(data, params):
+        """
+        Ключ записи
+
+        Args:
+            data: байты файла изображения
+            params: словарь параметров конвейера (сериализуемый в JSON)
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            {"version": PIPELINE_VERSION, **params}, sort_keys=True
+        ).encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / f'{key}.json'
+
+    def get(self, key):
+        """
+        Возвращает запись {board, confidences} или None при промахе.
+        Попадание обновляет время изменения записи (для LRU).
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Нет записи, её удалил другой процесс или файл повреждён
+            return None
+        return entry
+
+    def put(self, key, board, confidences=None):
+        """
+        Сохраняет распознанную доску и при необходимости вытесняет
+        самые давние записи
+
+        Args:
+            key: ключ из RecognitionCache.key
+            board: матрица 9x9
+            confidences: матрица 9x9 уверенностей или None
+        """
+        if isinstance(board, Board):
+            board = board.to_list()
+        entry = {"board": board, "confidences": confidences}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._evict()
+
+    def _entries(self):
+        """Список (mtime, size, path) всех записей"""
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи сверх max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """Удаляет все записи"""
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries())
+
+
+def _tie_orders(keys):
+    """
+    Все порядки элементов, отсортированных по ключу: перебираются
+    только перестановки внутри групп с равными ключами
+
+    Args:
+        keys: ключи элементов 0..len(keys)-1
+
+    Returns:
+        список кортежей индексов
+    """
+    ranked = sorted(range(len(keys)), key=keys.__getitem__)
+    groups = []
+    for i in ranked:
+        if groups and keys[groups[-1][0]] == keys[i]:
+            groups[-1].append(i)
+        else:
+            groups.append([i])
+    return [
+        sum(parts, ())
+        for parts in product(*(permutations(group) for group in groups))
+    ]
+
+
+def _count_orders(keys):
+    """Число порядков, которые вернёт _tie_orders, без их построения"""
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    total = 1
+    for count in counts.values():
+        total *= factorial(count)
+    return total
+
+
+def _line_orders(cells, limit):
+    """
+    Допустимые порядки строк доски: полосы и строки внутри полос
+    сортируются по инвариантам, не зависящим от перестановок столбцов
+    и цифр, перебираются только совпадающие
+
+    Args:
+        cells: 81 значение по строкам
+        limit: предел числа порядков
+
+    Returns:
+        список порядков (кортежей из 9 строк) или None, если их больше limit
+    """
+    # Инвариант строки: число цифр и отсортированные числа цифр по стекам
+    row_keys = []
+    for row in range(9):
+        line = cells[row * 9:row * 9 + 9]
+        segments = sorted(sum(1 for v in line[s:s + 3] if v) for s in (0, 3, 6))
+        row_keys.append((sum(segments), tuple(segments)))
+
+    band_keys = [tuple(sorted(row_keys[b * 3:b * 3 + 3])) for b in range(3)]
+    inner_keys = [row_keys[b * 3:b * 3 + 3] for b in range(3)]
+    total = _count_orders(band_keys)
+    for keys in inner_keys:
+        total *= _count_orders(keys)
+    if total > limit:
+        return None
+
+    band_orders = _tie_orders(band_keys)
+    inner_orders = [
+        [tuple(b * 3 + i for i in order) for order in _tie_orders(keys)]
+        for b, keys in enumerate(inner_keys)
+    ]
+    orders = []
+    for bands in band_orders:
+        for rows in product(*(inner_orders[b] for b in bands)):
+            orders.append(sum(rows, ()))
+    return orders
+
+
+def canonical_form(board, limit=CANONICAL_LIMIT):
+    """
+    Каноническая форма головоломки относительно симметрий Судоку
+
+    Перебираются обе ориентации и все порядки строк и столбцов,
+    согласованные с их инвариантами; цифры каждого кандидата
+    перенумеровываются по первому появлению, и берётся лексикографически
+    наименьший. Для головоломок, симметричных друг другу, результат
+    совпадает.
+
+    Args:
+        board: матрица 9x9
+        limit: предел числа преобразований на ориентацию
+
+    Returns:
+        (key, perm, labels): каноническая строка из 81 символа,
+        perm[i] — индекс исходной клетки для i-й канонической клетки,
+        labels — словарь исходная цифра -> каноническая; None, если
+        преобразований больше limit (слишком симметричная головоломка)
+        или доска не 9x9
+    """
+    if len(board) != 9:
+        return None
+    flat = flat_cells(board)
+    best = None
+    for base in (range(81), _TRANSPOSED):
+        cells = [flat[i] for i in base]
+        row_orders = _line_orders(cells, limit)
+        if row_orders is None:
+            return None
+        columns = [cells[i] for i in _TRANSPOSED]
+        col_orders = _line_orders(columns, limit // len(row_orders))
+        if col_orders is None:
+            return None
+
+        for rows in row_orders:
+            for cols in col_orders:
+                perm = [base[row * 9 + col] for row in rows for col in cols]
+                labels = {}
+                values = []
+                for i in perm:
+                    num = flat[i]
+                    if num and num not in labels:
+                        labels[num] = len(labels) + 1
+                    values.append(labels.get(num, 0))
+                if best is None or values < best[0]:
+                    best = (values, perm, labels)
+
+    values, perm, labels = best
+    return ''.join(map(str, values)), perm, labels
+
+
+class SolutionCache:
+    """
+    Ограниченный LRU-кэш решений по канонической форме.
+    Решение хранится в канонической нумерации и при попадании
+    переводится обратно в клетки и цифры исходной головоломки.
+
+    Перед канонизацией (около миллисекунды на доску) проверяется
+    точный ключ — байты клеток: повтор той же головоломки обходится
+    одним поиском в словаре.
+    """
+
+    def __init__(self, max_entries=10000, limit=CANONICAL_LIMIT):
+        """
+        Args:
+            max_entries: предельное число записей
+            limit: предел перебора при канонизации (см. canonical_form)
+        """
+        if max_entries <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.max_entries = max_entries
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Байты клеток головоломки -> байты решения (None — нерешаема)
+        self._exact = OrderedDict()
+
+    def lookup(self, board):
+        """
+        Ищет решение головоломки: сначала по точному ключу,
+        затем по канонической форме
+
+        Returns:
+            (found, solution, form): found — есть ли запись; solution —
+            решение (Board) для исходной доски или None, если головоломка
+            нерешаема; form — ключи для последующего store (точный ключ
+            и каноническая форма или None, если головоломка
+            не канонизируется)
+        """
+        exact = bytes(flat_cells(board))
+        if exact in self._exact:
+            self.hits += 1
+            self._exact.move_to_end(exact)
+            stored = self._exact[exact]
+            return True, None if stored is None else Board(stored), (exact, None)
+
+        form = canonical_form(board, self.limit)
+        if form is None or form[0] not in self._entries:
+            self.misses += 1
+            return False, None, (exact, form)
+
+        key, perm, labels = form
+        self.hits += 1
+        self._entries.move_to_end(key)
+        stored = self._entries[key]
+        solution = None
+        if stored is not None:
+            digits = _inverse_labels(labels)
+            cells = [0] * 81
+            for i, num in zip(perm, stored):
+                cells[i] = digits[num]
+            solution = Board(bytearray(cells))
+        self._remember(exact, solution)
+        return True, solution, (exact, form)
+
+    def _remember(self, exact, solution):
+        """Запоминает решение под точным ключом (LRU, как и канонические записи)"""
+        self._exact[exact] = None if solution is None else bytes(flat_cells(solution))
+        self._exact.move_to_end(exact)
+        while len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+
+    def store(self, form, solution):
+        """
+        Сохраняет решение
+
+        Args:
+            form: ключи из lookup
+            solution: решённая доска (Board или матрица) или None для нерешаемой
+        """
+        if form is None:
+            return
+        exact, form = form
+        self._remember(exact, solution)
+        if form is None:
+            return
+        key, perm, labels = form
+        stored = None
+        if solution is not None:
+            flat = flat_cells(solution)
+            labels = dict(labels)
+            # Цифрам, которых нет среди исходных, — свободные номера по порядку
+            free = iter(sorted(set(range(1, 10)) - set(labels.values())))
+            for num in range(1, 10):
+                if num not in labels:
+                    labels[num] = next(free)
+            stored = tuple(labels[flat[i]] for i in perm)
+
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _inverse_labels(labels):
+    """Обратная нумерация: каноническая цифра -> исходная (для всех 1-9)"""
+    digits = {canon: num for num, canon in labels.items()}
+    free = iter(sorted(set(range(1, 10)) - set(labels)))
+    for canon in range(1, 10):
+        if canon not in digits:
+            digits[canon] = next(free)
+    return digits
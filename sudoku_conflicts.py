@@ -0,0 +1,172 @@
+"""
+Инкрементальный поиск конфликтов при правке доски
+
+SudokuSolver.find_conflicts каждый раз обходит всю доску. При ручном
+исправлении ошибок распознавания клетки меняются по одной, поэтому
+ConflictTracker держит счётчики чисел в каждой группе и при смене
+одной клетки пересматривает только её группы (O(соседей)), а наружу
+отдаёт разницу: какие конфликты появились и какие исчезли.
+
+Конфликты — те же словари, что у find_conflicts: type, index, value,
+positions. Конфликт, у которого изменились позиции (третье совпадение
+в группе), приходит как снятый старый и добавленный новый словарь.
+"""
+
+from sudoku_board import flat_cells
+from sudoku_geometry import geometry as get_geometry
+
+
+class ConflictTracker:
+    """Конфликты доски, обновляемые по одной клетке"""
+
+    def __init__(self, board, geometry=None):
+        """
+        Args:
+            board: Board или матрица N×N (0 — пустая клетка); трекер
+                работает с копией клеток, исходная доска не меняется
+            geometry: sudoku_geometry.Geometry доски с вариантами
+                (None — классическая доска по её размеру)
+        """
+        g = self.geometry = geometry or get_geometry(len(board))
+        if g.size != len(board):
+            raise ValueError(f"Доска {len(board)}x{len(board)} не совпадает "
+                             f"с геометрией {g.size}x{g.size}")
+        self.cells = bytearray(flat_cells(board))
+        # Сколько раз каждое число стоит в группе и в клетке-сумме
+        self.unit_counts = [[0] * (g.size + 1) for _ in g.units]
+        self.cage_counts = [[0] * (g.size + 1) for _ in g.cages]
+        # Текущие суммы и число заполненных клеток клеток-сумм
+        self.cage_sums = [0] * len(g.cages)
+        self.cage_filled = [0] * len(g.cages)
+        # Активные конфликты по ключу: ('unit', группа, число),
+        # ('cage', клетка-сумма, число) или ('sum', клетка-сумма)
+        self.active = {}
+
+        for idx, num in enumerate(self.cells):
+            if num:
+                self._count(idx, num, 1)
+        for unit, counts in enumerate(self.unit_counts):
+            for num in range(1, g.size + 1):
+                if counts[num] > 1:
+                    self.active[('unit', unit, num)] = self._build(('unit', unit, num))
+        for cage, counts in enumerate(self.cage_counts):
+            for num in range(1, g.size + 1):
+                if counts[num] > 1:
+                    self.active[('cage', cage, num)] = self._build(('cage', cage, num))
+            if self._sum_broken(cage):
+                self.active[('sum', cage)] = self._build(('sum', cage))
+
+    def _count(self, idx, num, delta):
+        """Учитывает число num в клетке idx во всех её группах"""
+        g = self.geometry
+        for unit in g.units_of[idx]:
+            self.unit_counts[unit][num] += delta
+        for cage in g.cages_of[idx]:
+            self.cage_counts[cage][num] += delta
+            self.cage_sums[cage] += delta * num
+            self.cage_filled[cage] += delta
+
+    def _sum_broken(self, cage):
+        """Сумма клетки-суммы превышена или полная клетка-сумма не сходится"""
+        members, total = self.geometry.cages[cage]
+        current = self.cage_sums[cage]
+        return current > total or (current != total and self.cage_filled[cage] == len(members))
+
+    def _build(self, key):
+        """Словарь конфликта по ключу (в формате find_conflicts)"""
+        g = self.geometry
+        n = g.size
+        cells = self.cells
+        if key[0] == 'sum':
+            members, _ = g.cages[key[1]]
+            return {
+                'type': 'sum', 'index': key[1], 'value': self.cage_sums[key[1]],
+                'positions': [divmod(idx, n) for idx in members if cells[idx]]
+            }
+        kind, group, num = key
+        if kind == 'unit':
+            members = g.units[group]
+            kind, index = g.unit_names[group]
+        else:
+            members, _ = g.cages[group]
+            index = group
+        return {
+            'type': kind, 'index': index, 'value': num,
+            'positions': [divmod(idx, n) for idx in members if cells[idx] == num]
+        }
+
+    def _keys(self, idx, num):
+        """Ключи конфликтов, которые может затронуть число num в клетке idx"""
+        g = self.geometry
+        keys = [('unit', unit, num) for unit in g.units_of[idx]]
+        keys += [('cage', cage, num) for cage in g.cages_of[idx]]
+        return keys
+
+    def _broken(self, key):
+        """Есть ли сейчас конфликт с таким ключом"""
+        if key[0] == 'sum':
+            return self._sum_broken(key[1])
+        counts = self.unit_counts if key[0] == 'unit' else self.cage_counts
+        return counts[key[1]][key[2]] > 1
+
+    def set(self, row, col, num):
+        """
+        Ставит число в клетку (0 — очищает) и пересматривает только
+        группы этой клетки
+
+        Returns:
+            (добавленные, снятые) — списки словарей конфликтов
+        """
+        g = self.geometry
+        if not 0 <= num <= g.size:
+            raise ValueError(f"Значения клеток должны быть от 0 до {g.size}")
+        idx = row * g.size + col
+        old = self.cells[idx]
+        if old == num:
+            return [], []
+
+        # Затронуты группы клетки по старому и новому числу и её клетки-суммы
+        keys = []
+        if old:
+            keys += self._keys(idx, old)
+        if num:
+            keys += self._keys(idx, num)
+        keys += [('sum', cage) for cage in g.cages_of[idx]]
+
+        if old:
+            self._count(idx, old, -1)
+        self.cells[idx] = num
+        if num:
+            self._count(idx, num, 1)
+
+        added, removed = [], []
+        active = self.active
+        for key in keys:
+            before = active.pop(key, None)
+            if before is not None:
+                removed.append(before)
+            if self._broken(key):
+                active[key] = self._build(key)
+                added.append(active[key])
+        return added, removed
+
+    @property
+    def conflicts(self):
+        """Все текущие конфликты в том же порядке, что у find_conflicts"""
+        g = self.geometry
+
+        def order(item):
+            key, conflict = item
+            if key[0] == 'unit':
+                first = conflict['positions'][0]
+                return (0, key[1], g.units[key[1]].index(first[0] * g.size + first[1]))
+            if key[0] == 'cage':
+                first = conflict['positions'][0]
+                return (1, key[1], 0, g.cages[key[1]][0].index(first[0] * g.size + first[1]))
+            return (1, key[1], 1, 0)
+
+        return [conflict for _, conflict in sorted(self.active.items(), key=order)]
+
+    def cells_in_conflict(self):
+        """Множество (строка, столбец) клеток, участвующих в конфликтах"""
+        return {pos for conflict in self.active.values() for pos in conflict['positions']}
@@ -0,0 +1,301 @@
+"""
+Решатель Судоку через точное покрытие (Algorithm X, Dancing Links)
+
+Судоку N×N моделируется матрицей N³ строк (клетка x цифра) на 4N²
+ограничений (для 9x9 — 729 на 324):
+- в каждой клетке ровно одна цифра
+- в каждой строке, столбце и блоке каждая цифра ровно один раз
+Группы вариантов (диагонали, области jigsaw) — такие же столбцы
+«цифра в группе»; клетки-суммы точным покрытием не выражаются.
+Двусвязные списки хранятся в плоских массивах, поэтому покрытие
+и восстановление столбца — только перестановка индексов.
+"""
+
+import weakref
+
+from sudoku_board import flat_cells, write_cells
+from sudoku_engine import SearchAborted
+from sudoku_geometry import geometry as get_geometry
+
+# Размеры матрицы для доски 9x9
+N_COLUMNS = 324
+N_ROWS = 729
+
+# Наибольшая сторона доски: на 25x25 рекурсивный перебор без
+# распространения ограничений не укладывается в разумное время
+MAX_SIZE = 16
+
+# Шаблоны связей строятся один раз на геометрию и копируются для каждой доски
+_TEMPLATES = weakref.WeakKeyDictionary()
+
+
+def _row_columns(g, idx, num):
+    """Возвращает столбцы-ограничения для постановки num в клетку idx"""
+    square = g.cells
+    d = num - 1
+    # Клетка занята, затем цифра в каждой группе клетки
+    return (1 + idx,) + tuple(1 + square + unit * g.size + d for unit in g.units_of[idx])
+
+
+def _build_template(g):
+    """Строит массивы связей для полной матрицы N³ x (N² + N·групп)"""
+    size = g.size
+    n_columns = g.cells + len(g.units) * size
+    n_rows = g.cells * size
+    # Узел 0 — корень, 1..n_columns — заголовки столбцов
+    total = 1 + n_columns + sum((1 + len(units)) * size for units in g.units_of)
+    L = list(range(-1, total - 1))
+    R = list(range(1, total + 1))
+    U = list(range(total))
+    D = list(range(total))
+    C = list(range(total))
+    S = [0] * (n_columns + 1)
+    row_of = [-1] * total
+
+    # Кольцо заголовков
+    L[0] = n_columns
+    R[n_columns] = 0
+
+    node = n_columns + 1
+    for row_id in range(n_rows):
+        idx, d = divmod(row_id, size)
+        columns = _row_columns(g, idx, d + 1)
+        last = len(columns) - 1
+        for k, column in enumerate(columns):
+            # Вставляем узел в конец столбца
+            C[node] = column
+            U[node] = U[column]
+            D[node] = column
+            D[U[column]] = node
+            U[column] = node
+            S[column] += 1
+            # Связываем узлы строки в кольцо
+            L[node] = node - 1 if k else node + last
+            R[node] = node + 1 if k < last else node - last
+            row_of[node] = row_id
+            node += 1
+
+    return L, R, U, D, C, S, row_of
+
+
+class DancingLinks:
+    """Состояние точного покрытия для одной доски N×N"""
+
+    def __init__(self, board, geometry=None):
+        """
+        Строит матрицу покрытия и снимает строки, соответствующие
+        исходным цифрам доски
+
+        Args:
+            board: Board или матрица N×N (0 — пустая клетка)
+            geometry: sudoku_geometry.Geometry доски с вариантами
+                (None — классическая доска по её размеру)
+
+        Raises:
+            ValueError: если в варианте есть клетки-суммы — сумма
+                не выражается точным покрытием — или доска больше MAX_SIZE
+        """
+        g = geometry or get_geometry(len(board))
+        if g.size != len(board):
+            raise ValueError(f"Доска {len(board)}x{len(board)} не совпадает "
+                             f"с геометрией {g.size}x{g.size}")
+        if g.size > MAX_SIZE:
+            raise ValueError(f"Движок dlx поддерживает доски до {MAX_SIZE}x{MAX_SIZE}, "
+                             f"для {g.size}x{g.size} используйте backtrack")
+        if g.cages:
+            raise ValueError("Движок dlx не поддерживает клетки-суммы, используйте backtrack")
+        size = self.size = g.size
+        if g not in _TEMPLATES:
+            _TEMPLATES[g] = _build_template(g)
+
+        L, R, U, D, C, S, row_of = _TEMPLATES[g]
+        self.L, self.R, self.U, self.D = L[:], R[:], U[:], D[:]
+        self.C, self.S = C, S[:]
+        self.row_of = row_of
+        self.solution = []
+        self.nodes = 0
+        self.limits = None
+        # False, если исходные цифры уже противоречат друг другу
+        self.consistent = True
+        self.givens = []
+
+        covered = set()
+        for idx, num in enumerate(flat_cells(board)):
+            if num == 0:
+                continue
+            columns = _row_columns(g, idx, num)
+            if covered.intersection(columns):
+                self.consistent = False
+                continue
+            covered.update(columns)
+            self.givens.append(idx * size + num - 1)
+            for column in columns:
+                self._cover(column)
+
+    def _cover(self, c):
+        """Убирает столбец c и все строки, которые его покрывают"""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        """Возвращает столбец c (откат _cover в обратном порядке)"""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    def _choose_column(self):
+        """Выбирает столбец с минимальным числом строк (эвристика Кнута)"""
+        R, S = self.R, self.S
+        best = R[0]
+        best_size = S[best]
+        c = R[best]
+        while c != 0 and best_size > 1:
+            if S[c] < best_size:
+                best = c
+                best_size = S[c]
+            c = R[c]
+        return best
+
+    def solve(self, limits=None):
+        """
+        Algorithm X с ограничениями поиска
+
+        Args:
+            limits: sudoku_engine.SearchLimits (None — без ограничений)
+
+        Returns:
+            True если покрытие (решение) найдено, False иначе
+
+        Raises:
+            SearchAborted: если сработало одно из ограничений limits
+        """
+        self.limits = limits
+        return self._search()
+
+    def _search(self):
+        """Рекурсивный шаг Algorithm X"""
+        R, L, D, C = self.R, self.L, self.D, self.C
+        if R[0] == 0:
+            return True  # Все ограничения покрыты
+
+        c = self._choose_column()
+        if self.S[c] == 0:
+            return False  # Ограничение нечем покрыть — ветка невалидна
+
+        limits = self.limits
+        self._cover(c)
+        r = D[c]
+        while r != c:
+            if limits is not None:
+                limits.check(self.nodes)
+            self.solution.append(self.row_of[r])
+            self.nodes += 1
+
+            j = R[r]
+            while j != r:
+                self._cover(C[j])
+                j = R[j]
+
+            if self._search():
+                return True
+
+            j = L[r]
+            while j != r:
+                self._uncover(C[j])
+                j = L[j]
+
+            self.solution.pop()
+            r = D[r]
+
+        self._uncover(c)
+        return False
+
+    def count(self, limit, limits=None):
+        """
+        Считает покрытия (решения), останавливаясь на limit-м
+
+        Args:
+            limit: сколько решений достаточно найти
+            limits: sudoku_engine.SearchLimits (None — без ограничений)
+
+        Returns:
+            число найденных решений (не больше limit) или None, если
+            поиск остановлен ограничениями раньше, чем найдено limit решений
+        """
+        self.found = 0
+        self.limits = limits
+        try:
+            self._count(limit)
+        except SearchAborted:
+            return None
+        return self.found
+
+    def _count(self, limit):
+        """
+        Рекурсивный шаг подсчёта
+
+        Returns:
+            True если найдено limit решений и пора остановиться
+        """
+        R, L, D, C = self.R, self.L, self.D, self.C
+        if R[0] == 0:
+            self.found += 1
+            return self.found >= limit
+
+        c = self._choose_column()
+        if self.S[c] == 0:
+            return False
+
+        limits = self.limits
+        self._cover(c)
+        r = D[c]
+        while r != c:
+            if limits is not None:
+                limits.check(self.nodes)
+            self.nodes += 1
+
+            j = R[r]
+            while j != r:
+                self._cover(C[j])
+                j = R[j]
+
+            # Остановка: состояние не восстанавливается, оно больше не нужно
+            if self._count(limit):
+                return True
+
+            j = L[r]
+            while j != r:
+                self._uncover(C[j])
+                j = L[j]
+            r = D[r]
+
+        self._uncover(c)
+        return False
+
+    def write_to(self, board):
+        """Записывает найденное решение в Board или матрицу N×N (на месте)"""
+        cells = [0] * (self.size * self.size)
+        # Номер строки покрытия: (row * N + col) * N + d
+        for row_id in self.givens + self.solution:
+            cell, d = divmod(row_id, self.size)
+            cells[cell] = d + 1
+        write_cells(board, cells)
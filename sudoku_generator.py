@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Генератор головоломок Судоку
+
+- Полная сетка: три диагональных блока заполняются случайно (они не
+  зависят друг от друга), остальное достраивает решатель, затем сетка
+  перемешивается случайной симметрией (цифры, строки, столбцы, полосы,
+  стеки, транспонирование)
+- Выкапывание: клетки удаляются в случайном порядке, удаление
+  откатывается, если появляется другое решение: ищется решение,
+  в котором удалённая клетка отличается от сетки (одна остановка на
+  первом решении вместо полного подсчёта)
+- Сложность — по тому, какие стадии распространения решают головоломку
+  без перебора (см. LEVELS); слишком сложная головоломка упрощается
+  возвратом подсказок из сетки
+
+Каждая головоломка i строится своим генератором случайных чисел от
+(seed, i), поэтому результат воспроизводим при любом числе процессов.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_batch import _bounded_map, _chunks
+from sudoku_board import Board
+from sudoku_engine import BitmaskState
+from sudoku_io import format_board, open_output
+from sudoku_propagation import resolve_stages
+from sudoku_solver import SudokuSolver
+
+# Уровни сложности по возрастанию: стадии, которых достаточно для решения
+# без перебора; для "expert" нужен перебор
+LEVELS = {
+    "easy": ("naked_singles", "hidden_singles"),
+    "medium": ("naked_singles", "hidden_singles", "pointing"),
+    "hard": ("naked_singles", "hidden_singles", "pointing", "naked_pairs", "hidden_pairs"),
+    "expert": None,
+}
+
+_LEVEL_STAGES = {
+    level: resolve_stages(names) if names else None
+    for level, names in LEVELS.items()
+}
+
+# Для перебора при генерации одиночки быстрее полного набора стадий
+SEARCH_STAGES = LEVELS["easy"]
+_SEARCH_STAGES = resolve_stages(SEARCH_STAGES)
+
+
+def _solved_by(board, stages):
+    """Решается ли доска одними стадиями распространения (без перебора)"""
+    state = BitmaskState(board, stages)
+    return state.consistent and state.propagate() and state.mrv.select() is None
+
+
+def _within(board, level):
+    """
+    Решается ли доска стадиями уровня level без перебора.
+    Сначала пробуются более лёгкие (и более дешёвые) уровни.
+    """
+    for name, stages in _LEVEL_STAGES.items():
+        if _solved_by(board, stages):
+            return True
+        if name == level:
+            return False
+
+
+def _has_alternative(puzzle, removed):
+    """
+    Есть ли у головоломки решение, отличное от сетки в удалённых клетках
+
+    Для k-й удалённой клетки ищется решение, где предыдущие клетки
+    совпадают с сеткой, а в ней самой стоит другая цифра.
+
+    Args:
+        puzzle: головоломка (Board) с уже удалёнными клетками
+        removed: список (idx, num) удалённых клеток и их цифр в сетке
+    """
+    for k, (idx, num) in enumerate(removed):
+        state = BitmaskState(puzzle, _SEARCH_STAGES)
+        for other, other_num in removed[:k]:
+            state.assign(other, other_num)
+        state.eliminate(idx, 1 << (num - 1))
+        if state.solve():
+            return True
+    return False
+
+
+def rate(board):
+    """
+    Оценивает сложность головоломки с единственным решением
+
+    Returns:
+        имя самого лёгкого уровня из LEVELS, стадии которого решают доску
+    """
+    for level, stages in _LEVEL_STAGES.items():
+        if stages is None or _solved_by(board, stages):
+            return level
+
+
+def _shuffle(cells, rng):
+    """Случайная симметрия сетки: перестановки цифр, строк, столбцов и транспонирование"""
+    bands = rng.sample(range(3), 3)
+    rows = [band * 3 + i for band in bands for i in rng.sample(range(3), 3)]
+    stacks = rng.sample(range(3), 3)
+    cols = [stack * 3 + i for stack in stacks for i in rng.sample(range(3), 3)]
+    digits = [0] + rng.sample(range(1, 10), 9)
+    if rng.random() < 0.5:
+        rows, cols = cols, rows
+        return bytearray(digits[cells[col * 9 + row]] for row in rows for col in cols)
+    return bytearray(digits[cells[row * 9 + col]] for row in rows for col in cols)
+
+
+def random_grid(rng, solver):
+    """
+    Строит случайную полностью заполненную сетку
+
+    Args:
+        rng: random.Random
+        solver: SudokuSolver для достраивания сетки
+
+    Returns:
+        Board без пустых клеток
+    """
+    grid = Board()
+    for box in (0, 4, 8):
+        digits = rng.sample(range(1, 10), 9)
+        top, left = (box // 3) * 3, (box % 3) * 3
+        for i, num in enumerate(digits):
+            grid[top + i // 3, left + i % 3] = num
+    # Диагональные блоки не пересекаются по строкам и столбцам,
+    # поэтому доска всегда решаема
+    solver.solve(grid)
+    grid.cells = _shuffle(grid.cells, rng)
+    return grid
+
+
+def _groups(symmetric):
+    """Группы клеток, удаляемых вместе: по одной или центрально-симметричными парами"""
+    if not symmetric:
+        return [(idx,) for idx in range(81)]
+    return [tuple(sorted({idx, 80 - idx})) for idx in range(41)]
+
+
+def dig(grid, rng, min_clues=17, symmetric=False):
+    """
+    Удаляет подсказки из полной сетки, сохраняя единственность решения.
+    Результат минимален: удаление любой оставшейся подсказки (группы)
+    даёт второе решение или нарушает min_clues.
+
+    Args:
+        grid: полная сетка (Board)
+        rng: random.Random
+        min_clues: меньше этого числа подсказок не оставлять
+        symmetric: удалять клетки парами, симметричными относительно центра
+
+    Returns:
+        головоломка (Board)
+    """
+    puzzle = grid.copy()
+    cells = puzzle.cells
+    clues = 81
+    groups = _groups(symmetric)
+    rng.shuffle(groups)
+
+    for group in groups:
+        if clues - len(group) < min_clues:
+            continue
+        removed = [(i, cells[i]) for i in group]
+        for i in group:
+            cells[i] = 0
+        if _has_alternative(puzzle, removed):
+            for i, num in removed:
+                cells[i] = num
+        else:
+            clues -= len(group)
+    return puzzle
+
+
+def ease(puzzle, grid, rng, level, symmetric=False):
+    """
+    Возвращает подсказки из сетки в случайном порядке, пока головоломка
+    не станет решаемой стадиями уровня level (на месте)
+
+    Args:
+        puzzle: головоломка (Board), изменяется на месте
+        grid: полная сетка (Board) — решение головоломки
+        rng: random.Random
+        level: целевой уровень из LEVELS
+        symmetric: возвращать подсказки симметричными парами
+    """
+    if _within(puzzle, level):
+        return
+    cells = puzzle.cells
+    groups = [group for group in _groups(symmetric) if cells[group[0]] == 0]
+    rng.shuffle(groups)
+    for group in groups:
+        for i in group:
+            cells[i] = grid.cells[i]
+        if _within(puzzle, level):
+            return
+
+
+def generate(rng=None, difficulty=None, min_clues=17, max_clues=81,
+             symmetric=False, attempts=200, solver=None):
+    """
+    Генерирует одну головоломку с единственным решением
+
+    Args:
+        rng: random.Random или число-зерно (None — случайное)
+        difficulty: уровень из LEVELS (None — любой)
+        min_clues: нижняя граница числа подсказок
+        max_clues: верхняя граница числа подсказок
+        symmetric: центральная симметрия подсказок
+        attempts: сколько сеток попробовать, прежде чем сдаться
+        solver: SudokuSolver для построения сеток (создаётся, если не передан)
+
+    Returns:
+        словарь {puzzle, solution, clues, difficulty, attempts}
+    """
+    if difficulty is not None and difficulty not in LEVELS:
+        raise ValueError(f"Неизвестный уровень сложности: {difficulty}")
+    if not 17 <= min_clues <= max_clues <= 81:
+        raise ValueError("Нужно 17 <= min_clues <= max_clues <= 81")
+    if not isinstance(rng, random.Random):
+        rng = random.Random(rng)
+    if solver is None:
+        solver = SudokuSolver(propagation=SEARCH_STAGES)
+
+    for attempt in range(1, attempts + 1):
+        grid = random_grid(rng, solver)
+        puzzle = dig(grid, rng, min_clues, symmetric)
+        # Слишком сложную головоломку упрощаем возвратом подсказок
+        if difficulty not in (None, "expert"):
+            ease(puzzle, grid, rng, difficulty, symmetric)
+        clues = sum(1 for num in puzzle.cells if num)
+        if clues > max_clues:
+            continue
+        level = rate(puzzle)
+        if difficulty is None or level == difficulty:
+            return {
+                "puzzle": puzzle,
+                "solution": grid,
+                "clues": clues,
+                "difficulty": level,
+                "attempts": attempt,
+            }
+    raise ValueError(f"Не удалось построить головоломку за {attempts} попыток")
+
+
+def _generate_chunk(chunk, seed, options):
+    """Генерирует головоломки с номерами из порции в одном процессе"""
+    # Один решатель на порцию: конструктор вызывает gc.collect()
+    solver = SudokuSolver(propagation=SEARCH_STAGES)
+    results = []
+    for index, _ in chunk:
+        record = generate(random.Random(f"{seed}-{index}"), solver=solver, **options)
+        record["index"] = index
+        results.append(record)
+    return results
+
+
+def generate_many(count, workers=None, seed=None, chunksize=8, **options):
+    """
+    Генерирует головоломки на пуле процессов (генератор, в порядке номеров)
+
+    Args:
+        count: число головоломок
+        workers: число процессов (None — по числу ядер, 1 — без пула)
+        seed: зерно; при одном и том же зерне результат одинаков
+            при любом числе процессов (None — случайное)
+        chunksize: сколько головоломок отправлять процессу за раз
+        **options: параметры generate (difficulty, min_clues, max_clues,
+            symmetric, attempts)
+
+    Yields:
+        словари {index, puzzle, solution, clues, difficulty, attempts}
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = _chunks(range(count), chunksize)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _generate_chunk(chunk, seed, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in _bounded_map(pool, _generate_chunk, chunks, workers * 4,
+                                    True, seed, options):
+            yield from results
+
+
+def main():
+    """Генерация головоломок из командной строки"""
+    parser = argparse.ArgumentParser(description='Sudoku puzzle generator')
+    parser.add_argument('-n', '--count', type=int, default=100,
+                        help='Сколько головоломок сгенерировать')
+    parser.add_argument('-d', '--difficulty', choices=list(LEVELS), default=None,
+                        help='Уровень сложности (по умолчанию — любой)')
+    parser.add_argument('--min-clues', type=int, default=17,
+                        help='Минимальное число подсказок')
+    parser.add_argument('--max-clues', type=int, default=81,
+                        help='Максимальное число подсказок')
+    parser.add_argument('--symmetric', action='store_true',
+                        help='Центрально-симметричное расположение подсказок')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Зерно генератора для воспроизводимости')
+    parser.add_argument('--attempts', type=int, default=200,
+                        help='Сколько сеток пробовать на одну головоломку')
+    parser.add_argument('--with-solutions', action='store_true',
+                        help='Дописывать решение через табуляцию')
+    parser.add_argument('-o', '--output', default='-',
+                        help="Куда писать головоломки ('-' — stdout, '.gz' — gzip)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Число процессов (по умолчанию — все ядра)')
+    args = parser.parse_args()
+
+    log = sys.stderr
+    print(f"\n🎲 Генерация: {args.count} головоломок -> {args.output} "
+          f"(процессов: {args.workers or os.cpu_count()})", file=log)
+
+    levels = {}
+    start = time.perf_counter()
+    with open_output(args.output) as out:
+        records = generate_many(
+            args.count, workers=args.workers, seed=args.seed,
+            difficulty=args.difficulty, min_clues=args.min_clues,
+            max_clues=args.max_clues, symmetric=args.symmetric,
+            attempts=args.attempts,
+        )
+        try:
+            for record in records:
+                line = format_board(record['puzzle'])
+                if args.with_solutions:
+                    line += '\t' + format_board(record['solution'])
+                out.write(line + '\n')
+                levels[record['difficulty']] = levels.get(record['difficulty'], 0) + 1
+        except ValueError as e:
+            print(f"❌ {e}", file=log)
+            sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"📈 Статистика:", file=log)
+    for level in LEVELS:
+        if level in levels:
+            print(f"   • {level}: {levels[level]}", file=log)
+    print(f"   • Время: {elapsed:.2f} с ({args.count / elapsed * 60 if elapsed else 0:.0f} головоломок/мин)", file=log)
+
+
+if __name__ == "__main__":
+    main()
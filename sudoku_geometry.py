@@ -0,0 +1,211 @@
+"""
+Геометрия доски Судоку N×N
+
+Доска N×N (N = 4, 9, 16, 25) делится на N блоков b×b, где b² = N.
+Клетки нумеруются по строкам от 0 до N² - 1, цифры — от 1 до N,
+кандидаты клетки — N-битная маска (бит d — цифра d + 1). Таблицы
+индексов и соседей строятся один раз на размер.
+
+Варианты (sudoku_variants) добавляют к строкам, столбцам и блокам свои
+группы: области вместо блоков (jigsaw), дополнительные группы из N клеток
+(диагонали) и клетки-суммы (killer). Соседи клетки считаются по всем
+группам сразу, поэтому поиск и проверки обходят только готовые таблицы,
+каким бы ни был вариант.
+
+Для 9×9 таблицы цифр и числа битов маски строятся сразу (512 масок);
+для 16×16 и 25×25 масок 2^16 и 2^25, поэтому значения вычисляются
+при первом обращении и запоминаются.
+"""
+
+import math
+from collections import Counter
+
+# Поддерживаемые размеры доски
+SIZES = (4, 9, 16, 25)
+
+# Символ цифры в текстовом формате: значение v — SYMBOLS[v - 1]
+# (для 16×16 — 1-9 и A-G, для 25×25 — 1-9 и A-P)
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+class _MaskTable(dict):
+    """Таблица по маске, значения которой вычисляются при первом обращении"""
+
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, mask):
+        value = self[mask] = self.compute(mask)
+        return value
+
+
+def _digits_of(mask):
+    """Цифры маски по возрастанию"""
+    digits = []
+    while mask:
+        low = mask & -mask
+        digits.append(low.bit_length())
+        mask ^= low
+    return tuple(digits)
+
+
+def _membership(groups, cells):
+    """Для каждой клетки — номера групп, в которые она входит"""
+    found = [[] for _ in range(cells)]
+    for k, members in enumerate(groups):
+        for idx in members:
+            found[idx].append(k)
+    return [tuple(groups) for groups in found]
+
+
+class Geometry:
+    """Таблицы индексов для доски N×N и её варианта"""
+
+    def __init__(self, size, variants=()):
+        """
+        Args:
+            size: сторона доски N (одно из SIZES)
+            variants: варианты из sudoku_variants (пусто — классическая доска)
+        """
+        if size not in SIZES:
+            raise ValueError(f"Неподдерживаемый размер доски: {size} "
+                             f"(допустимы {', '.join(map(str, SIZES))})")
+        box = math.isqrt(size)
+        self.size = size
+        self.box = box
+        self.cells = size * size
+        self.full_mask = (1 << size) - 1
+        self.variants = tuple(variants)
+
+        rows = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        cols = [tuple(r * size + c for r in range(size)) for c in range(size)]
+        boxes = [
+            tuple((br * box + r) * size + bc * box + c for r in range(box) for c in range(box))
+            for br in range(box) for bc in range(box)
+        ]
+        box_names = [('box', (br, bc)) for br in range(box) for bc in range(box)]
+
+        # Группы вариантов: области вместо блоков, дополнительные группы
+        # из N клеток и клетки-суммы
+        houses, house_names, cages = [], [], []
+        for variant in self.variants:
+            regions = variant.regions(size)
+            if regions is not None:
+                boxes = self._check_regions(regions)
+                box_names = [(variant.kind, k) for k in range(size)]
+            for k, unit in enumerate(variant.units(size)):
+                houses.append(self._check_unit(unit))
+                house_names.append((variant.kind, k))
+            for cells, total in variant.cages(size):
+                cages.append((self._check_cage(cells, total), total))
+
+        # Индексы строки, столбца и блока (области) для каждой клетки
+        self.row_of = [idx // size for idx in range(self.cells)]
+        self.col_of = [idx % size for idx in range(self.cells)]
+        self.box_of = [0] * self.cells
+        for k, members in enumerate(boxes):
+            for idx in members:
+                self.box_of[idx] = k
+
+        # Группы, где каждая цифра стоит ровно один раз: строки 0..N-1,
+        # столбцы N..2N-1, блоки 2N..3N-1, затем группы вариантов;
+        # unit_names — (тип, номер) каждой группы для отчётов о конфликтах
+        self.units = rows + cols + boxes + houses
+        self.unit_names = (
+            [('row', r) for r in range(size)] + [('col', c) for c in range(size)]
+            + box_names + house_names
+        )
+        self.units_of = _membership(self.units, self.cells)
+        # Клетки-суммы: (клетки, сумма), цифры в клетке не повторяются
+        self.cages = cages
+
+        # Группы сверх строк, столбцов и блоков (варианты и клетки-суммы):
+        # поиск держит для них отдельные маски занятости
+        self.extra_units = houses + [cells for cells, _ in cages]
+        self.extra_of = _membership(self.extra_units, self.cells)
+        self.cages_of = _membership([cells for cells, _ in cages], self.cells)
+
+        # Наибольшее пересечение блока (области) со строкой или столбцом
+        self.overlap = max(
+            max(Counter(line_of[idx] for idx in members).values())
+            for members in boxes for line_of in (self.row_of, self.col_of)
+        )
+
+        # Соседи клетки: клетки всех её групп и клеток-сумм
+        linked = [set() for _ in range(self.cells)]
+        for members in self.units + [cells for cells, _ in cages]:
+            for idx in members:
+                linked[idx].update(members)
+        self.peers = [tuple(sorted(linked[idx] - {idx})) for idx in range(self.cells)]
+
+        # Число установленных битов и список цифр для каждой маски
+        if size <= 9:
+            self.popcount = [mask.bit_count() for mask in range(1 << size)]
+            self.digits = [_digits_of(mask) for mask in range(1 << size)]
+        else:
+            self.popcount = _MaskTable(int.bit_count)
+            self.digits = _MaskTable(_digits_of)
+
+    def _check_unit(self, unit):
+        """Группа из N разных клеток доски"""
+        unit = tuple(unit)
+        if len(unit) != self.size or len(set(unit)) != self.size \
+                or not all(0 <= idx < self.cells for idx in unit):
+            raise ValueError(f"Группа должна состоять из {self.size} разных клеток доски")
+        return unit
+
+    def _check_regions(self, regions):
+        """N областей по N клеток, вместе покрывающих доску"""
+        regions = [self._check_unit(region) for region in regions]
+        if len(regions) != self.size or len({idx for region in regions for idx in region}) != self.cells:
+            raise ValueError(f"Области должны разбивать доску на {self.size} частей "
+                             f"по {self.size} клеток")
+        return regions
+
+    def _check_cage(self, cells, total):
+        """Клетка-сумма: разные клетки доски и достижимая сумма"""
+        cells = tuple(cells)
+        k = len(cells)
+        if not 1 <= k <= self.size or len(set(cells)) != k \
+                or not all(0 <= idx < self.cells for idx in cells):
+            raise ValueError(f"Клетка-сумма должна состоять из 1-{self.size} разных клеток доски")
+        low = k * (k + 1) // 2
+        high = k * (2 * self.size - k + 1) // 2
+        if not low <= total <= high:
+            raise ValueError(f"Сумма {total} недостижима для {k} клеток ({low}-{high})")
+        return cells
+
+    def __repr__(self):
+        if self.variants:
+            return f"Geometry({self.size}, {list(self.variants)!r})"
+        return f"Geometry({self.size})"
+
+
+_GEOMETRIES = {}
+
+
+def geometry(size, variants=()):
+    """
+    Геометрия доски size×size: классическая общая (кэшированная),
+    с вариантами — новая
+    """
+    if variants:
+        return Geometry(size, variants)
+    if size not in _GEOMETRIES:
+        _GEOMETRIES[size] = Geometry(size)
+    return _GEOMETRIES[size]
+
+
+def size_for_cells(count):
+    """
+    Сторона доски по числу клеток
+
+    Raises:
+        ValueError: если count не равно N² ни для одного из SIZES
+    """
+    size = math.isqrt(count)
+    if size * size != count or size not in SIZES:
+        raise ValueError(f"Доска должна содержать "
+                         f"{', '.join(str(n * n) for n in SIZES)} клеток, получено {count}")
+    return size
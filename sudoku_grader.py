@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Оценка сложности Судоку по приёмам, которыми её решает человек
+
+Головоломка решается логически: на каждом шаге применяется самый
+лёгкий приём из TECHNIQUES, который что-то меняет, после чего поиск
+снова начинается с самого лёгкого. Для каждого приёма записывается,
+сколько раз он понадобился и сколько цифр поставил и кандидатов
+исключил. Оценка (score) — рейтинг самого сложного понадобившегося
+приёма (как в шкале Sudoku Explainer); если приёмов не хватило,
+доска дорешивается перебором и получает рейтинг SEARCH_RATING.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_batch import _bounded_map, _chunks
+from sudoku_board import Board
+from sudoku_engine import BitmaskState, Contradiction, SearchLimits
+from sudoku_io import format_board, open_output, read_puzzles
+from sudoku_propagation import STAGES
+
+# Приёмы по возрастанию сложности и их рейтинг
+TECHNIQUES = (
+    ("hidden_singles", 1.5),
+    ("naked_singles", 2.3),
+    ("pointing", 2.6),
+    ("naked_pairs", 3.0),
+    ("x_wing", 3.2),
+    ("hidden_pairs", 3.4),
+    ("swordfish", 3.8),
+)
+
+# Рейтинг головоломки, которую приёмы не решают
+SEARCH_RATING = 7.0
+
+# Уровни по верхней границе рейтинга (те же имена, что в sudoku_generator)
+LEVELS = (
+    ("easy", 2.3),
+    ("medium", 2.6),
+    ("hard", 3.8),
+    ("expert", SEARCH_RATING),
+)
+
+# Предел узлов перебора при дорешивании
+MAX_SEARCH_NODES = 100000
+
+
+def level_of(score):
+    """Уровень сложности по рейтингу"""
+    for level, limit in LEVELS:
+        if score <= limit:
+            return level
+    return LEVELS[-1][0]
+
+
+def grade(board, max_nodes=MAX_SEARCH_NODES):
+    """
+    Решает головоломку приёмами и строит трассу
+
+    Args:
+        board: Board, строка из 81 символа или матрица 9x9
+        max_nodes: предел узлов перебора, если приёмов не хватило
+
+    Returns:
+        словарь {valid, solved_logically, techniques, hardest, score,
+        level, search_nodes, solutions}; techniques — {имя: {uses,
+        placements, eliminations}} для понадобившихся приёмов в порядке
+        TECHNIQUES; solutions — 0, 1, 2 (два и больше) или None, если
+        не хватило max_nodes
+    """
+    if not isinstance(board, Board):
+        board = Board(board)
+    state = BitmaskState(board)
+    record = {
+        "valid": state.consistent,
+        "solved_logically": False,
+        "techniques": {},
+        "hardest": None,
+        "score": 0.0,
+        "level": None,
+        "search_nodes": 0,
+        "solutions": 0,
+    }
+    if not state.consistent:
+        return record
+
+    trace = {}
+    stages = [(name, STAGES[name], rating) for name, rating in TECHNIQUES]
+    try:
+        progress = True
+        while progress and state.mrv.select() is not None:
+            progress = False
+            for name, stage, rating in stages:
+                mark = len(state.trail)
+                if not stage(state):
+                    continue
+                entry = trace.setdefault(name, {"uses": 0, "placements": 0, "eliminations": 0})
+                entry["uses"] += 1
+                for _, value in state.trail[mark:]:
+                    if value > 0:
+                        entry["placements"] += 1
+                    else:
+                        entry["eliminations"] += 1
+                if rating > record["score"]:
+                    record["score"] = rating
+                    record["hardest"] = name
+                # После любого изменения снова начинаем с самого лёгкого приёма
+                progress = True
+                break
+    except Contradiction:
+        record["valid"] = False
+        return record
+
+    record["techniques"] = {name: trace[name] for name, _ in TECHNIQUES if name in trace}
+    if state.mrv.select() is None:
+        record["solved_logically"] = True
+        record["solutions"] = 1
+    else:
+        # Приёмов не хватило: дорешиваем перебором с теми же приёмами
+        state.stages = tuple(stage for _, stage, _ in stages)
+        record["solutions"] = state.count(2, SearchLimits(max_nodes=max_nodes))
+        record["search_nodes"] = state.nodes
+        record["score"] = SEARCH_RATING
+        record["hardest"] = "search"
+    record["level"] = level_of(record["score"])
+    return record
+
+
+def _grade_chunk(chunk, max_nodes):
+    """Оценивает порцию головоломок в одном процессе"""
+    results = []
+    for index, puzzle in chunk:
+        record = grade(puzzle, max_nodes)
+        record["index"] = index
+        record["puzzle"] = puzzle if isinstance(puzzle, str) else format_board(puzzle)
+        results.append(record)
+    return results
+
+
+def grade_many(puzzles, workers=None, chunksize=64, max_nodes=MAX_SEARCH_NODES):
+    """
+    Оценивает поток головоломок на пуле процессов (генератор, в порядке входа)
+
+    Args:
+        puzzles: строки из 81 символа, Board или матрицы 9x9
+        workers: число процессов (None — по числу ядер, 1 — без пула)
+        chunksize: размер порции, отправляемой процессу за раз
+        max_nodes: предел узлов перебора на головоломку
+
+    Yields:
+        словари grade с полями index и puzzle
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = _chunks(puzzles, chunksize)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _grade_chunk(chunk, max_nodes)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in _bounded_map(pool, _grade_chunk, chunks, workers * 4,
+                                    True, max_nodes):
+            yield from results
+
+
+def format_trace(record):
+    """Краткая запись трассы: 'hidden_singles:12,naked_pairs:1'"""
+    parts = [f"{name}:{entry['uses']}" for name, entry in record["techniques"].items()]
+    if record["search_nodes"]:
+        parts.append(f"search:{record['search_nodes']}")
+    return ','.join(parts)
+
+
+def main():
+    """Оценка корпуса из командной строки"""
+    parser = argparse.ArgumentParser(description='Sudoku difficulty grader')
+    parser.add_argument('input', help="Файл с головоломками по одной строке из 81 символа "
+                                      "('-' — stdin, поддерживается gzip)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Куда писать строки «головоломка<TAB>уровень<TAB>рейтинг<TAB>приёмы» "
+                             "('-' — stdout, '.gz' — gzip)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Число процессов (по умолчанию — все ядра)')
+    args = parser.parse_args()
+
+    log = sys.stderr
+    print(f"\n🎓 Оценка сложности: {args.input} -> {args.output} "
+          f"(процессов: {args.workers or os.cpu_count()})", file=log)
+
+    levels = {}
+    total = invalid = 0
+    start = time.perf_counter()
+    with open_output(args.output) as out:
+        for record in grade_many(read_puzzles(args.input), workers=args.workers):
+            total += 1
+            if not record["valid"]:
+                invalid += 1
+                out.write(f"{record['puzzle']}\tinvalid\t\t\n")
+                continue
+            levels[record["level"]] = levels.get(record["level"], 0) + 1
+            out.write(f"{record['puzzle']}\t{record['level']}\t{record['score']:.1f}\t"
+                      f"{format_trace(record)}\n")
+    elapsed = time.perf_counter() - start
+
+    print(f"📈 Статистика:", file=log)
+    for level, _ in LEVELS:
+        if level in levels:
+            print(f"   • {level}: {levels[level]}", file=log)
+    if invalid:
+        print(f"   • Некорректных: {invalid}", file=log)
+    print(f"   • Время: {elapsed:.2f} с ({total / elapsed if elapsed else 0:.0f} головоломок/с)", file=log)
+
+
+if __name__ == "__main__":
+    main()
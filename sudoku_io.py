@@ -0,0 +1,141 @@
+"""
+Текстовый формат Судоку: одна головоломка на строку из 81 символа
+(цифры 1-9, пустые клетки — '.' или '0'). Доски 4x4, 16x16 и 25x25
+записываются так же строкой из N² символов, цифры больше 9 — буквами
+(см. sudoku_geometry.SYMBOLS).
+
+Строку головоломки разбирает Board (sudoku_board) — единственный
+парсер формата; здесь только потоковое чтение и запись.
+
+Чтение и запись построчные (генераторы), поэтому память не растёт
+с размером корпуса. Поддерживаются stdin/stdout ('-') и gzip.
+"""
+
+import gzip
+import io
+import re
+import sys
+from contextlib import contextmanager
+
+from sudoku_board import Board
+from sudoku_geometry import SIZES, SYMBOLS
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Длины строк головоломок поддерживаемых размеров
+PUZZLE_LENGTHS = tuple(size * size for size in SIZES)
+
+# Разделитель между головоломкой и остатком строки
+_SEPARATOR = re.compile(r'[ \t,;]')
+
+
+def format_board(board, blank='.'):
+    """
+    Записывает доску одной строкой из N² символов
+
+    Args:
+        board: Board или матрица N×N
+        blank: символ для пустых клеток
+    """
+    if isinstance(board, Board):
+        return board.to_string(blank)
+    return ''.join(SYMBOLS[num - 1] if num else blank for row in board for num in row)
+
+
+@contextmanager
+def open_input(path):
+    """
+    Открывает корпус для построчного чтения.
+    Сжатие gzip определяется по сигнатуре, а не по расширению.
+
+    Args:
+        path: путь к файлу или '-' для stdin
+    """
+    if path == '-':
+        raw = sys.stdin.buffer
+    else:
+        raw = open(path, 'rb')
+
+    # peek не сдвигает позицию, поэтому работает и для stdin
+    if raw.peek(2)[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    else:
+        stream = raw
+    text = io.TextIOWrapper(stream, encoding='ascii', errors='replace')
+
+    try:
+        yield text
+    finally:
+        if raw is sys.stdin.buffer:
+            text.detach()  # stdin не закрываем
+        else:
+            text.close()
+            raw.close()
+
+
+@contextmanager
+def open_output(path):
+    """
+    Открывает файл для построчной записи решений
+
+    Args:
+        path: путь к файлу ('.gz' — сжатие gzip) или '-' для stdout
+    """
+    if path == '-':
+        yield sys.stdout
+        sys.stdout.flush()
+    elif str(path).endswith('.gz'):
+        with gzip.open(path, 'wt', encoding='ascii') as f:
+            yield f
+    else:
+        with open(path, 'w', encoding='ascii') as f:
+            yield f
+
+
+def iter_lines(stream):
+    """
+    Выдаёт строки головоломок из потока (генератор).
+    Пустые строки и комментарии ('#') пропускаются; всё, что идёт
+    после головоломки (первых 81 или N² символов) через пробел,
+    запятую или табуляцию, отбрасывается.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        separator = _SEPARATOR.search(line)
+        if separator and separator.start() in PUZZLE_LENGTHS:
+            line = line[:separator.start()]
+        yield line
+
+
+def read_puzzles(path):
+    """
+    Читает головоломки из файла или stdin построчно (генератор)
+
+    Args:
+        path: путь к текстовому или gzip-файлу, '-' — stdin
+    """
+    with open_input(path) as stream:
+        yield from iter_lines(stream)
+
+
+def write_solutions(results, stream):
+    """
+    Пишет решения по одной строке на головоломку по мере поступления.
+    Для нерешённой или некорректной головоломки (запись с error) пишется
+    пустая строка, чтобы i-я строка выхода соответствовала i-й
+    головоломке входа.
+
+    Args:
+        results: итерируемые результаты iter_solve (в порядке входа)
+        stream: текстовый поток для записи
+
+    Yields:
+        каждый результат после записи (для подсчёта статистики)
+    """
+    for result in results:
+        if result['solved']:
+            stream.write(format_board(result['solution']))
+        stream.write('\n')
+        yield result
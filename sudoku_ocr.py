@@ -0,0 +1,315 @@
+"""
+Распознавание цифр клеток Судоку
+
+Бэкенды реализуют интерфейс DigitRecognizer.recognize(rois) и
+распознают все клетки сетки за один вызов:
+- TesseractRecognizer(batch=True): все клетки склеиваются в одну ленту и
+  распознаются одним вызовом tesseract, символы сопоставляются клеткам
+  по позиции
+- TesseractRecognizer(batch=False): отдельный вызов tesseract на клетку
+  (медленно: каждый вызов — новый процесс и временные файлы)
+- TemplateRecognizer: встроенный классификатор по шаблонам без внешних
+  программ; все клетки классифицируются одним матричным умножением
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import pytesseract
+except ImportError:  # Для TemplateRecognizer tesseract не нужен
+    pytesseract = None
+
+CELL_CONFIG = '--psm 10 digits'
+# Одна строка текста, только цифры 1-9
+MONTAGE_CONFIG = '--psm 7 -c tessedit_char_whitelist=123456789'
+
+# Размер клетки в ленте и белое поле вокруг неё
+TILE_SIZE = 48
+TILE_PAD = 16
+
+# Нормализованная цифра: 20x20 по центру поля 28x28 (как в MNIST)
+NORM_SIZE = 28
+NORM_DIGIT = 20
+
+# Шаблоны цифр, нарисованные распространёнными свободными шрифтами
+# (DejaVu, Lato, Source Code Pro), см. render_font_templates
+TEMPLATES_PATH = Path(__file__).with_name('digit_templates.npz')
+
+
+def _parse_digit(text):
+    """Превращает ответ OCR в цифру 1-9 (0 — не распознано)"""
+    text = text.strip()
+    try:
+        digit = int(text) if text else 0
+    except ValueError:
+        return 0
+    return digit if 0 <= digit <= 9 else 0
+
+
+def build_montage(rois):
+    """
+    Склеивает клетки в одну горизонтальную ленту с белыми промежутками
+
+    Returns:
+        (montage, pitch): изображение ленты и шаг между клетками в пикселях
+    """
+    pitch = TILE_SIZE + 2 * TILE_PAD
+    montage = np.full((pitch, pitch * len(rois)), 255, dtype=np.uint8)
+    for i, roi in enumerate(rois):
+        tile = cv2.resize(roi, (TILE_SIZE, TILE_SIZE), interpolation=cv2.INTER_CUBIC)
+        x = i * pitch + TILE_PAD
+        montage[TILE_PAD:TILE_PAD + TILE_SIZE, x:x + TILE_SIZE] = tile
+    return montage, pitch
+
+
+def digit_canvas(roi):
+    """
+    Приводит изображение цифры к стандартному виду: чернила — светлые,
+    берётся наибольшая связная область, она вписывается в 20x20
+    с сохранением пропорций по центру поля 28x28 (как в MNIST)
+
+    Args:
+        roi: цифра в оттенках серого (тёмная на светлом)
+
+    Returns:
+        массив 28x28 float32 (0-255) или None, если в клетке нет чернил
+    """
+    _, ink = cv2.threshold(roi, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    if count < 2:
+        return None
+
+    # Области, касающиеся края, — обрывки линий сетки; из остальных
+    # наибольшая — цифра
+    height, width = roi.shape[:2]
+    x0, y0 = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+    x1 = x0 + stats[:, cv2.CC_STAT_WIDTH]
+    y1 = y0 + stats[:, cv2.CC_STAT_HEIGHT]
+    inner = (x0 > 0) & (y0 > 0) & (x1 < width) & (y1 < height)
+    areas = np.where(inner, stats[:, cv2.CC_STAT_AREA], 0)
+    areas[0] = 0
+    label = int(np.argmax(areas))
+    if areas[label] < 0.02 * height * width:
+        return None
+    x, y, w, h = stats[label, :4]
+
+    digit = np.where(labels[y:y + h, x:x + w] == label, 255, 0).astype(np.uint8)
+    scale = NORM_DIGIT / max(w, h)
+    new_w = max(1, int(round(w * scale)))
+    new_h = max(1, int(round(h * scale)))
+    digit = cv2.resize(digit, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+    canvas = np.zeros((NORM_SIZE, NORM_SIZE), dtype=np.float32)
+    top = (NORM_SIZE - new_h) // 2
+    left = (NORM_SIZE - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = digit
+    return canvas
+
+
+def _to_vectors(canvases):
+    """Превращает поля 28x28 в строки с нулевым средним и единичной нормой"""
+    vectors = np.asarray(canvases, dtype=np.float32).reshape(len(canvases), -1)
+    vectors = vectors - vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def render_font_templates(font_paths, path=TEMPLATES_PATH, size=64):
+    """
+    Рисует цифры 1-9 TrueType-шрифтами и сохраняет шаблоны в .npz.
+    Нужен только для обновления поставляемого файла шаблонов (требует Pillow).
+
+    Args:
+        font_paths: пути к .ttf/.otf шрифтам
+        path: куда сохранить файл шаблонов
+        size: кегль при отрисовке
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    canvases = []
+    labels = []
+    for font_path in font_paths:
+        font = ImageFont.truetype(str(font_path), size)
+        for digit in range(1, 10):
+            image = Image.new('L', (size * 3 // 2, size * 3 // 2), 255)
+            center = (image.width // 2, image.height // 2)
+            ImageDraw.Draw(image).text(center, str(digit), font=font, fill=0, anchor='mm')
+            canvas = digit_canvas(np.array(image))
+            if canvas is not None:
+                canvases.append(canvas.astype(np.uint8))
+                labels.append(digit)
+    np.savez_compressed(path, canvases=np.stack(canvases), labels=np.array(labels, dtype=np.uint8))
+
+
+class DigitRecognizer(ABC):
+    """Интерфейс бэкенда распознавания цифр"""
+
+    @abstractmethod
+    def recognize(self, rois):
+        """
+        Распознаёт все клетки сетки за один вызов
+
+        Args:
+            rois: список изображений цифр (оттенки серого)
+
+        Returns:
+            (digits, confidences): цифры 0-9 (0 — не распознано) и
+            уверенность в [0, 1] или None, если бэкенд её не даёт
+        """
+
+
+class TesseractRecognizer(DigitRecognizer):
+    """Распознавание через Tesseract OCR"""
+
+    def __init__(self, batch=True):
+        """
+        Args:
+            batch: True — одна лента на всю сетку, False — вызов на клетку
+        """
+        if pytesseract is None:
+            raise ImportError("Для OCR через Tesseract установите pytesseract")
+        self.batch = batch
+
+    def recognize(self, rois):
+        if not rois:
+            return [], []
+        if self.batch:
+            digits = self._recognize_montage(rois)
+        else:
+            digits = [
+                _parse_digit(pytesseract.image_to_string(roi, config=CELL_CONFIG))
+                for roi in rois
+            ]
+        return digits, [None] * len(rois)
+
+    def _recognize_montage(self, rois):
+        """
+        Распознаёт все клетки за один вызов tesseract.
+        Каждый найденный символ относится к клетке по центру своей рамки.
+        """
+        montage, pitch = build_montage(rois)
+        boxes = pytesseract.image_to_boxes(montage, config=MONTAGE_CONFIG)
+
+        digits = [0] * len(rois)
+        for line in boxes.splitlines():
+            parts = line.split()
+            if len(parts) < 5 or not '1' <= parts[0] <= '9':
+                continue
+            center = (int(parts[1]) + int(parts[3])) // 2
+            i = center // pitch
+            # Первый символ в клетке считаем цифрой, остальные — шумом
+            if 0 <= i < len(digits) and digits[i] == 0:
+                digits[i] = int(parts[0])
+        return digits
+
+
+class TemplateRecognizer(DigitRecognizer):
+    """
+    Встроенный классификатор без внешних программ.
+
+    Шаблоны — цифры 1-9 из поставляемого файла digit_templates.npz
+    и цифры, нарисованные векторными шрифтами OpenCV; все нормализованы
+    так же, как клетки. Клетка относится к цифре ближайшего шаблона
+    (косинусное сходство); сходства всех клеток со всеми шаблонами
+    считаются одним умножением матриц.
+    """
+
+    FONTS = (
+        cv2.FONT_HERSHEY_SIMPLEX,
+        cv2.FONT_HERSHEY_DUPLEX,
+        cv2.FONT_HERSHEY_COMPLEX,
+        cv2.FONT_HERSHEY_TRIPLEX,
+        cv2.FONT_HERSHEY_PLAIN,
+        cv2.FONT_HERSHEY_SIMPLEX | cv2.FONT_ITALIC,
+    )
+    THICKNESSES = (2, 4, 6, 8)
+
+    # Шаблоны общие для всех экземпляров и строятся один раз
+    _templates = None
+    _labels = None
+
+    def __init__(self, min_confidence=0.3):
+        """
+        Args:
+            min_confidence: ниже этого сходства клетка считается
+                нераспознанной (0)
+        """
+        self.min_confidence = min_confidence
+        if TemplateRecognizer._templates is None:
+            TemplateRecognizer._build_templates()
+
+    @classmethod
+    def _build_templates(cls):
+        """Загружает поставляемые шаблоны и дорисовывает шрифты OpenCV"""
+        canvases = []
+        labels = []
+        if TEMPLATES_PATH.exists():
+            with np.load(TEMPLATES_PATH) as data:
+                canvases.extend(data['canvases'].astype(np.float32))
+                labels.extend(int(label) for label in data['labels'])
+
+        for font in cls.FONTS:
+            for thickness in cls.THICKNESSES:
+                for digit in range(1, 10):
+                    image = np.full((96, 96), 255, dtype=np.uint8)
+                    text = str(digit)
+                    scale = cv2.getFontScaleFromHeight(font & 0xF, 60, thickness)
+                    (w, h), _ = cv2.getTextSize(text, font, scale, thickness)
+                    origin = ((96 - w) // 2, (96 + h) // 2)
+                    cv2.putText(image, text, origin, font, scale, 0, thickness, cv2.LINE_AA)
+                    canvas = digit_canvas(image)
+                    if canvas is not None:
+                        canvases.append(canvas)
+                        labels.append(digit)
+
+        cls._templates = _to_vectors(canvases)
+        cls._labels = np.array(labels)
+
+    def recognize(self, rois):
+        if not rois:
+            return [], []
+
+        digits = [0] * len(rois)
+        confidences = [0.0] * len(rois)
+        canvases = [digit_canvas(roi) for roi in rois]
+        filled = [i for i, canvas in enumerate(canvases) if canvas is not None]
+        if not filled:
+            return digits, confidences
+
+        # (клетки x шаблоны) косинусных сходств
+        scores = _to_vectors([canvases[i] for i in filled]) @ self._templates.T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(filled)), best]
+
+        for i, template, score in zip(filled, best, best_scores):
+            confidence = float(max(score, 0.0))
+            if confidence >= self.min_confidence:
+                digits[i] = int(self._labels[template])
+            confidences[i] = confidence
+        return digits, confidences
+
+
+# Бэкенды по имени для SudokuSolver(ocr=...)
+RECOGNIZERS = {
+    "batch": lambda: TesseractRecognizer(batch=True),
+    "cell": lambda: TesseractRecognizer(batch=False),
+    "template": TemplateRecognizer,
+}
+
+
+def get_recognizer(ocr):
+    """
+    Возвращает бэкенд распознавания
+
+    Args:
+        ocr: имя из RECOGNIZERS или готовый экземпляр DigitRecognizer
+    """
+    if isinstance(ocr, DigitRecognizer):
+        return ocr
+    if ocr not in RECOGNIZERS:
+        raise ValueError(f"Неизвестный режим OCR: {ocr}")
+    return RECOGNIZERS[ocr]()
@@ -0,0 +1,220 @@
+"""
+Параллельный поиск по одной головоломке
+
+Верхние уровни дерева поиска по MRV раскрываются в текущем процессе
+в независимые подзадачи (доски с поставленной цифрой в клетке
+ветвления), которые решаются на пуле процессов. Подзадачи не
+пересекаются, поэтому первое найденное решение останавливает
+остальные через общий флаг отмены, а при подсчёте решений результаты
+подзадач складываются.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from sudoku_board import Board
+from sudoku_engine import BitmaskState, CancelToken
+from sudoku_geometry import geometry as get_geometry
+from sudoku_propagation import resolve_stages
+from sudoku_solver import SudokuSolver
+
+# Подзадач на процесс: с запасом, чтобы процессы не простаивали,
+# когда одни ветви оказываются намного тяжелее других
+SUBPROBLEMS_PER_WORKER = 8
+
+# Как часто главный процесс проверяет срок и внешнюю отмену, с
+POLL_INTERVAL = 0.05
+
+# Решатель и флаг отмены процесса пула (задаются инициализатором)
+_worker_solver = None
+_worker_cancel = None
+
+
+def split_board(board, count, stages=(), geometry=None):
+    """
+    Раскрывает верхние уровни дерева поиска по MRV в ширину,
+    пока подзадач не станет не меньше count
+
+    Args:
+        board: Board или матрица N×N
+        count: сколько подзадач нужно
+        stages: стадии распространения ограничений (функции)
+        geometry: sudoku_geometry.Geometry доски с вариантами (None — классическая)
+
+    Returns:
+        (подзадачи, решения): списки Board; решения — доски, решённые
+        распространением прямо при раскрытии
+    """
+    frontier = deque([Board(board)])
+    solutions = []
+    while frontier and len(frontier) < count:
+        state = BitmaskState(frontier.popleft(), stages, geometry)
+        if not state.consistent or not state.propagate():
+            continue
+        idx = state.mrv.select()
+        cells = bytearray(state.cells)
+        if idx is None:
+            solutions.append(Board(cells))
+            continue
+        for num in state.digits[state.candidates(idx)]:
+            cells[idx] = num
+            frontier.append(Board(cells))
+    return list(frontier), solutions
+
+
+def _init_worker(event, options):
+    """Инициализатор процесса пула: один решатель на процесс"""
+    global _worker_solver, _worker_cancel
+    _worker_solver = SudokuSolver(**options)
+    _worker_cancel = CancelToken(event)
+
+
+def _solve_subproblem(board, max_nodes):
+    """Ищет решение подзадачи: (solved, решение или None, узлы, причина остановки)"""
+    solver = _worker_solver
+    solved = solver.solve(board, max_nodes=max_nodes, cancel=_worker_cancel)
+    return solved, board if solved else None, solver.last_nodes, solver.abort_reason
+
+
+def _count_subproblem(board, limit, max_nodes):
+    """Считает решения подзадачи (None — поиск прерван)"""
+    return _worker_solver.count_solutions(board, limit, max_nodes=max_nodes,
+                                          cancel=_worker_cancel)
+
+
+def _split(board, workers, options):
+    """Раскрывает доску на подзадачи для workers процессов (см. split_board)"""
+    variants = options.get("variants")
+    return split_board(board, workers * SUBPROBLEMS_PER_WORKER,
+                       resolve_stages(options.get("propagation")),
+                       get_geometry(len(board), variants) if variants else None)
+
+
+def _run(subproblems, workers, options, task, args, on_result, timeout, cancel):
+    """
+    Раздаёт подзадачи пулу и передаёт результаты в on_result(result)
+    по мере готовности, пока он не вернёт True
+
+    Returns:
+        причина остановки или None
+    """
+    if not subproblems:
+        return None
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    event = multiprocessing.Event()
+    reason = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(event, options)) as pool:
+        pending = {pool.submit(task, sub, *args) for sub in subproblems}
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=POLL_INTERVAL,
+                                     return_when=FIRST_COMPLETED)
+                if any(on_result(future.result()) for future in done):
+                    break
+                if cancel is not None and cancel.cancelled:
+                    reason = "cancelled"
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    reason = "timeout"
+                    break
+        finally:
+            # Запущенные подзадачи останавливаются по флагу, остальные снимаются
+            event.set()
+            for future in pending:
+                future.cancel()
+    return reason
+
+
+def solve_parallel(board, workers, options=None, timeout=None, max_nodes=None, cancel=None):
+    """
+    Ищет решение одной головоломки на пуле процессов
+
+    Args:
+        board: Board или матрица N×N (не изменяется)
+        workers: число процессов
+        options: параметры SudokuSolver для процессов (engine, propagation, size, variants)
+        timeout: предел времени в секундах на весь поиск
+        max_nodes: предел узлов поиска на одну подзадачу
+        cancel: sudoku_engine.CancelToken для отмены из другого потока
+
+    Returns:
+        словарь {solved, solution, nodes, abort_reason}; solved — True,
+        False или None (поиск прерван). При нескольких решениях
+        возвращается то, что найдено первым.
+    """
+    options = dict(options or {})
+    record = {"solved": False, "solution": None, "nodes": 0, "abort_reason": None}
+
+    subproblems, solutions = _split(board, workers, options)
+    if solutions:
+        # Ветка решилась распространением уже при раскрытии: остальные
+        # подзадачи не нужны, пул не создаётся
+        record["solved"] = True
+        record["solution"] = solutions[0]
+        return record
+
+    def on_result(result):
+        solved, solution, nodes, reason = result
+        record["nodes"] += nodes
+        if solved:
+            record["solved"] = True
+            record["solution"] = solution
+            return True
+        if solved is None and reason != "cancelled":
+            # Подзадача исчерпала предел узлов: отсутствие решения не доказано
+            record["abort_reason"] = reason
+        return False
+
+    reason = _run(subproblems, workers, options, _solve_subproblem, (max_nodes,),
+                  on_result, timeout, cancel)
+    if not record["solved"] and (reason or record["abort_reason"]):
+        record["solved"] = None
+        record["abort_reason"] = reason or record["abort_reason"]
+    return record
+
+
+def count_parallel(board, limit, workers, options=None, timeout=None, max_nodes=None,
+                   cancel=None):
+    """
+    Считает решения одной головоломки на пуле процессов, складывая
+    результаты подзадач и останавливаясь на limit-м
+
+    Args:
+        board: Board или матрица N×N (не изменяется)
+        limit: сколько решений достаточно найти
+        workers: число процессов
+        options: параметры SudokuSolver для процессов (engine, propagation, size, variants)
+        timeout: предел времени в секундах на весь подсчёт
+        max_nodes: предел узлов поиска на одну подзадачу
+        cancel: sudoku_engine.CancelToken для отмены из другого потока
+
+    Returns:
+        число решений (не больше limit) или None, если подсчёт прерван
+        раньше, чем найдено limit решений или исчерпан перебор
+    """
+    options = dict(options or {})
+    subproblems, solutions = _split(board, workers, options)
+    # Решения, найденные при раскрытии, входят в сумму с самого начала
+    totals = {"found": len(solutions), "aborted": False}
+    if totals["found"] >= limit:
+        return limit
+
+    def on_result(count):
+        if count is None:
+            totals["aborted"] = True
+            return False
+        totals["found"] += count
+        return totals["found"] >= limit
+
+    reason = _run(subproblems, workers, options, _count_subproblem, (limit, max_nodes),
+                  on_result, timeout, cancel)
+    found = totals["found"]
+    if found >= limit:
+        return limit
+    if reason or totals["aborted"]:
+        return None
+    return found
@@ -0,0 +1,294 @@
+"""
+Распространение ограничений для решателя Судоку
+
+Каждая техника — отдельная стадия: функция stage(state) -> bool,
+которая работает с BitmaskState через assign/eliminate, возвращает True,
+если что-то изменила, и бросает Contradiction при противоречии.
+Стадии можно включать и выключать по имени через STAGES.
+"""
+
+from functools import lru_cache
+from itertools import combinations
+
+from sudoku_engine import Contradiction
+
+
+def _unit_positions(state, unit):
+    """
+    Для каждой цифры, ещё не стоящей в группе, строит маску позиций
+    (бит i — клетка units[unit][i]), где она остаётся кандидатом
+
+    Returns:
+        список из N масок позиций (индекс — цифра - 1)
+    """
+    positions = [0] * state.size
+    cells = state.cells
+    digits = state.digits
+    for i, idx in enumerate(state.geometry.units[unit]):
+        if cells[idx]:
+            continue
+        for num in digits[state.candidates(idx)]:
+            positions[num - 1] |= 1 << i
+    return positions
+
+
+def naked_singles(state):
+    """Единственный кандидат в клетке — ставим его"""
+    buckets = state.mrv.buckets
+    digits = state.digits
+    changed = False
+    while buckets[1]:
+        if buckets[0]:
+            raise Contradiction()
+        idx = next(iter(buckets[1]))
+        state.assign(idx, digits[state.candidates(idx)][0])
+        changed = True
+    if buckets[0]:
+        raise Contradiction()
+    return changed
+
+
+def hidden_singles(state):
+    """Цифра может стоять только в одной клетке группы — ставим её"""
+    cells = state.cells
+    full_mask = state.full_mask
+    changed = False
+    for unit, members in enumerate(state.geometry.units):
+        once = twice = 0
+        for idx in members:
+            if cells[idx] == 0:
+                mask = state.candidates(idx)
+                twice |= once & mask
+                once |= mask
+        placed = state.unit_mask(unit)
+        if (once | placed) != full_mask:
+            raise Contradiction()  # Цифре негде стоять в группе
+        singles = once & ~twice & ~placed
+        if not singles:
+            continue
+        for idx in members:
+            if cells[idx] == 0:
+                mask = state.candidates(idx) & singles
+                if mask:
+                    if state.popcount[mask] > 1:
+                        raise Contradiction()  # Две цифры на одно место
+                    state.assign(idx, state.digits[mask][0])
+                    changed = True
+    return changed
+
+
+def naked_pairs(state):
+    """Две клетки группы с одной и той же парой кандидатов"""
+    cells = state.cells
+    popcount = state.popcount
+    changed = False
+    for members in state.geometry.units:
+        seen = {}
+        for idx in members:
+            if cells[idx] == 0:
+                mask = state.candidates(idx)
+                if popcount[mask] == 2:
+                    seen.setdefault(mask, []).append(idx)
+        for mask, pair in seen.items():
+            if len(pair) > 2:
+                raise Contradiction()  # Три клетки на две цифры
+            if len(pair) < 2:
+                continue
+            for idx in members:
+                if cells[idx] == 0 and idx not in pair:
+                    changed |= state.eliminate(idx, mask)
+    return changed
+
+
+def hidden_pairs(state):
+    """Две цифры группы возможны только в одних и тех же двух клетках"""
+    popcount = state.popcount
+    changed = False
+    for unit, members in enumerate(state.geometry.units):
+        positions = _unit_positions(state, unit)
+        by_positions = {}
+        for d, where in enumerate(positions):
+            if popcount[where] == 2:
+                by_positions.setdefault(where, []).append(d)
+        for where, digits in by_positions.items():
+            if len(digits) != 2:
+                continue
+            keep = (1 << digits[0]) | (1 << digits[1])
+            for i, idx in enumerate(members):
+                if where >> i & 1:
+                    changed |= state.eliminate(idx, state.full_mask & ~keep)
+    return changed
+
+
+def pointing(state):
+    """
+    Пересечение блока и линии (pointing/claiming): если в блоке цифра
+    возможна только в одной строке/столбце — убираем её из остальной
+    линии, и наоборот. Группы вариантов (диагонали) работают как линии.
+    """
+    g = state.geometry
+    size = g.size
+    row_of, col_of, box_of = g.row_of, g.col_of, g.box_of
+    changed = False
+    for unit, members in enumerate(g.units):
+        positions = _unit_positions(state, unit)
+        for d, where in enumerate(positions):
+            if not where or state.popcount[where] > g.overlap:
+                continue
+            spots = [members[i] for i in range(size) if where >> i & 1]
+            if 2 * size <= unit < 3 * size:
+                # Блок -> строка или столбец
+                targets = []
+                if all(row_of[idx] == row_of[spots[0]] for idx in spots):
+                    targets.append(row_of[spots[0]])
+                if all(col_of[idx] == col_of[spots[0]] for idx in spots):
+                    targets.append(size + col_of[spots[0]])
+            elif all(box_of[idx] == box_of[spots[0]] for idx in spots):
+                # Строка, столбец или диагональ -> блок
+                targets = [2 * size + box_of[spots[0]]]
+            else:
+                continue
+            bit = 1 << d
+            for target in targets:
+                for idx in g.units[target]:
+                    if state.cells[idx] == 0 and idx not in spots:
+                        changed |= state.eliminate(idx, bit)
+    return changed
+
+
+@lru_cache(maxsize=None)
+def _sum_digits(count, total, mask):
+    """
+    Цифры маски mask, входящие хотя бы в один набор из count разных
+    цифр этой маски с суммой total (маска; 0 — таких наборов нет)
+    """
+    if count == 0:
+        return 0
+    allowed = 0
+    for num in range(1, min(total, mask.bit_length()) + 1):
+        bit = 1 << (num - 1)
+        if not mask & bit:
+            continue
+        # Остальные цифры набора берём больше num, чтобы не считать наборы дважды
+        rest = mask & ~((bit << 1) - 1)
+        if count == 1:
+            if num == total:
+                allowed |= bit
+        else:
+            others = _sum_digits(count - 1, total - num, rest)
+            if others:
+                allowed |= bit | others
+    return allowed
+
+
+def cage_sums(state):
+    """
+    Клетки-суммы (killer): в пустые клетки клетки-суммы годятся только
+    цифры, из которых можно набрать оставшуюся сумму. Полная клетка-сумма
+    с другой суммой — противоречие.
+    """
+    cells = state.cells
+    changed = False
+    for members, total in state.geometry.cages:
+        rest = total
+        empty = []
+        union = 0
+        for idx in members:
+            if cells[idx]:
+                rest -= cells[idx]
+            else:
+                empty.append(idx)
+                union |= state.candidates(idx)
+        if not empty:
+            if rest:
+                raise Contradiction()
+            continue
+        allowed = _sum_digits(len(empty), rest, union) if rest > 0 else 0
+        if not allowed:
+            raise Contradiction()
+        for idx in empty:
+            changed |= state.eliminate(idx, state.full_mask & ~allowed)
+    return changed
+
+
+def _fish(state, size):
+    """
+    Рыба размера size: если в size строках цифра возможна только
+    в одних и тех же size столбцах, из остальных клеток этих столбцов
+    её можно убрать (и то же с ролями строк и столбцов наоборот)
+    """
+    changed = False
+    cells = state.cells
+    popcount = state.popcount
+    units = state.geometry.units
+    n = state.size
+    for base, cover_base in ((0, n), (n, 0)):
+        positions = [_unit_positions(state, base + line) for line in range(n)]
+        for d in range(n):
+            lines = [
+                (line, positions[line][d]) for line in range(n)
+                if 2 <= popcount[positions[line][d]] <= size
+            ]
+            for fish in combinations(lines, size):
+                cover = 0
+                for _, where in fish:
+                    cover |= where
+                if popcount[cover] != size:
+                    continue
+                base_lines = [line for line, _ in fish]
+                bit = 1 << d
+                for i in range(n):
+                    if not cover >> i & 1:
+                        continue
+                    # i-я клетка строки — столбец i, и наоборот
+                    for j, idx in enumerate(units[cover_base + i]):
+                        if cells[idx] == 0 and j not in base_lines:
+                            changed |= state.eliminate(idx, bit)
+    return changed
+
+
+def x_wing(state):
+    """X-wing: рыба на двух строках (столбцах)"""
+    return _fish(state, 2)
+
+
+def swordfish(state):
+    """Swordfish: рыба на трёх строках (столбцах)"""
+    return _fish(state, 3)
+
+
+# Реестр стадий в порядке возрастания стоимости
+STAGES = {
+    "naked_singles": naked_singles,
+    "hidden_singles": hidden_singles,
+    "naked_pairs": naked_pairs,
+    "hidden_pairs": hidden_pairs,
+    "pointing": pointing,
+    "x_wing": x_wing,
+    "swordfish": swordfish,
+    "cage_sums": cage_sums,
+}
+
+# Рыбы редко срабатывают и дорого стоят в переборе, поэтому по умолчанию
+# решатель их не использует (они нужны оценщику сложности)
+DEFAULT_STAGES = (
+    "naked_singles", "hidden_singles", "naked_pairs", "hidden_pairs", "pointing",
+)
+
+
+def resolve_stages(names):
+    """
+    Превращает имена стадий в функции
+
+    Args:
+        names: имена из STAGES (None или пустой список — без распространения)
+
+    Returns:
+        кортеж функций стадий
+    """
+    if not names:
+        return ()
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Неизвестные стадии распространения: {', '.join(unknown)}")
+    return tuple(STAGES[name] for name in names)
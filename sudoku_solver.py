@@ -6,7 +6,6 @@
 
 import cv2
 import numpy as np
-import pytesseract
 import os
 import sys
 import gc
@@ -14,6 +13,15 @@ import time
 import argparse
 from pathlib import Path
 
+from sudoku_board import Board, flat_cells, write_cells
+from sudoku_cache import RecognitionCache, SolutionCache
+from sudoku_engine import BitmaskState, SearchAborted, SearchLimits
+from sudoku_ocr import RECOGNIZERS, DigitRecognizer, get_recognizer
+from sudoku_dlx import MAX_SIZE as DLX_MAX_SIZE, DancingLinks
+from sudoku_geometry import SIZES, SYMBOLS, geometry
+from sudoku_propagation import DEFAULT_STAGES, resolve_stages
+from sudoku_variants import VARIANTS, Jigsaw
+
 # Очистка кэша для обновления данных
 gc.collect()
 
@@ -21,16 +29,89 @@ gc.collect()
 class SudokuSolver:
     """Класс для распознавания и решения Судоку"""
     
-    def __init__(self, image_path=None):
+    # Доступные движки решения: перебор с возвратом и точное покрытие
+    ENGINES = {
+        "backtrack": BitmaskState,
+        "dlx": DancingLinks,
+    }
+    
+    # Предел узлов для проверки единственности распознанной доски:
+    # при пропущенных цифрах второе решение находится быстро
+    UNIQUENESS_MAX_NODES = 10000
+    
+    def __init__(self, image_path=None, engine="backtrack", propagation=DEFAULT_STAGES,
+                 ocr="batch", cache=None, solution_cache=None, timeout=None, max_nodes=None, workers=None, size=9,
+                 variants=()):
         """
         Инициализация решателя Судоку
         
         Args:
             image_path: путь к изображению Судоку (опционально)
+            engine: движок решения — "backtrack" или "dlx"
+            propagation: имена стадий распространения ограничений для
+                движка "backtrack" (см. sudoku_propagation.STAGES);
+                None — чистый перебор
+            ocr: бэкенд распознавания цифр — "batch" (tesseract, все клетки
+                за один вызов), "cell" (tesseract на каждую клетку),
+                "template" (встроенный классификатор без tesseract)
+                или экземпляр sudoku_ocr.DigitRecognizer
+            cache: кэш распознавания — sudoku_cache.RecognitionCache или
+                путь к его каталогу; None — без кэша
+            solution_cache: кэш решений по канонической форме —
+                sudoku_cache.SolutionCache или его размер в записях;
+                None — без кэша
+            timeout: предел времени одного solve в секундах по умолчанию
+                (None — без предела)
+            max_nodes: предел узлов поиска одного solve по умолчанию
+                (None — без предела; при workers > 1 — на подзадачу)
+            workers: число процессов для поиска по одной головоломке:
+                верхние уровни дерева поиска раздаются пулу (см.
+                sudoku_parallel); None или 1 — в текущем процессе
+            size: сторона сетки на изображениях — 4, 9, 16 или 25 (решаются
+                доски любого из этих размеров, размер берётся из доски)
+            variants: варианты правил из sudoku_variants (диагонали, jigsaw,
+                killer) для досок size×size; пусто — классическое Судоку
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок решения: {engine}")
+        if not isinstance(ocr, DigitRecognizer) and ocr not in RECOGNIZERS:
+            raise ValueError(f"Неизвестный режим OCR: {ocr}")
+        
         self.board = None
         self.image_path = image_path
+        self.variants = tuple(variants)
+        self.geometry = geometry(size, self.variants)
+        if engine == "dlx" and self.geometry.cages:
+            raise ValueError("Движок dlx не поддерживает клетки-суммы, используйте backtrack")
+        if engine == "dlx" and size > DLX_MAX_SIZE:
+            raise ValueError(f"Движок dlx поддерживает доски до {DLX_MAX_SIZE}x{DLX_MAX_SIZE}, "
+                             f"для {size}x{size} используйте backtrack")
+        self.size = size
+        self.engine = engine
+        self.propagation = resolve_stages(propagation)
+        self.propagation_names = tuple(propagation or ())
+        self.ocr = ocr
+        if cache is not None and not isinstance(cache, RecognitionCache):
+            cache = RecognitionCache(cache)
+        self.cache = cache
+        if solution_cache is not None and not isinstance(solution_cache, SolutionCache):
+            solution_cache = SolutionCache(solution_cache)
+        self.solution_cache = solution_cache
+        # Бэкенд создаётся при первом распознавании
+        self._recognizer = None
+        self.confidences = None
+        # Взята ли доска последнего recognize из кэша распознавания
+        self.last_cached = False
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.workers = workers
         self.solution_steps = 0
+        # Итог последнего solve: "solved", "unsolvable" или "aborted",
+        # причина остановки ("nodes", "timeout", "cancelled"), узлы и время
+        self.status = None
+        self.abort_reason = None
+        self.last_nodes = 0
+        self.last_time = 0.0
         # Очищаем кэш при создании нового экземпляра
         gc.collect()
         
@@ -45,19 +126,122 @@ class SudokuSolver:
             image_path: путь к фа4йлу изображения
             
         Returns:
-            board: матрица 9x9 с распознанными цифрами
+            board: Board с распознанными цифрами
         """
         # Очищаем старые данные
         gc.collect()
         
+        self.board = self.recognize(image_path)
+        return self.board
+    
+    def recognize(self, image_path, timings=None):
+        """
+        Распознаёт доску на изображении: кэш, чтение, поиск сетки и OCR.
+        В отличие от load_board_from_image не меняет self.board.
+        
+        Args:
+            image_path: путь к файлу изображения
+            timings: словарь, в который записывается время стадий
+                в секундах: decode, preprocess и ocr (при попадании
+                в кэш — только decode)
+            
+        Returns:
+            Board с распознанными цифрами; self.confidences — уверенности
+            клеток, self.last_cached — взята ли доска из кэша
+        """
+        if timings is None:
+            timings = {}
+        
+        t = time.perf_counter()
+        key, data, entry = self._cache_lookup(image_path)
+        self.last_cached = entry is not None
+        if entry is not None:
+            timings["decode"] = time.perf_counter() - t
+            self.confidences = entry["confidences"]
+            return Board(entry["board"])
+        
+        image = self._decode_image(image_path, data)
+        timings["decode"] = time.perf_counter() - t
+        
+        t = time.perf_counter()
+        warped = self._extract_grid(image)
+        timings["preprocess"] = time.perf_counter() - t
+        
+        # Распознавание цифр
+        t = time.perf_counter()
+        board = self._recognize_digits(warped)
+        timings["ocr"] = time.perf_counter() - t
+        self._cache_store(key, board)
+        return board
+    
+    def _cache_params(self):
+        """Параметры конвейера, от которых зависит результат распознавания"""
+        if isinstance(self.ocr, DigitRecognizer):
+            ocr = type(self.ocr).__qualname__
+            settings = {name: repr(value) for name, value in sorted(vars(self.ocr).items())}
+        else:
+            ocr, settings = self.ocr, {}
+        params = {"ocr": ocr, "ocr_settings": settings}
+        # Для 9x9 ключи кэша остаются прежними
+        if self.size != 9:
+            params["size"] = self.size
+        return params
+    
+    def _cache_lookup(self, image_path):
+        """
+        Ищет изображение в кэше распознавания
+        
+        Returns:
+            (key, data, entry): ключ, байты файла и запись кэша или None
+            при промахе; без кэша — (None, None, None)
+        """
+        if self.cache is None:
+            return None, None, None
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Файл не найден: {image_path}")
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        key = self.cache.key(data, self._cache_params())
+        return key, data, self.cache.get(key)
+    
+    def _cache_store(self, key, board):
+        """Сохраняет результат распознавания в кэш (если он включён)"""
+        if self.cache is not None and key is not None:
+            self.cache.put(key, board, self.confidences)
+    
+    def _decode_image(self, image_path, data=None):
+        """
+        Читает изображение с диска
         
-        # Читаем изображение напрямую из файла (без кэширования)
-        image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        Args:
+            image_path: путь к файлу изображения
+            data: уже прочитанные байты файла (чтобы не читать его дважды)
+            
+        Returns:
+            image: изображение BGR
+        """
+        if data is not None:
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        else:
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Файл не найден: {image_path}")
+            
+            # Читаем изображение напрямую из файла (без кэширования)
+            image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
         if image is None:
             raise ValueError(f"Не удалось прочитать изображение: {image_path}")
+        return image
+    
+    def _extract_grid(self, image):
+        """
+        Находит сетку Судоку на изображении и выпрямляет её
         
+        Args:
+            image: изображение BGR
+            
+        Returns:
+            warped: выпрямленная сетка (50 пикселей на клетку, 450x450 для 9x9)
+        """
         # Предварительная обработка
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -98,17 +282,14 @@ class SudokuSolver:
         pts = self._order_points(pts)
         
         # Перспективное преобразование
-        side = 450
+        side = 50 * self.size
         dst_pts = np.float32([
             [0, 0], [side, 0], [0, side], [side, side]
         ])
         
         matrix = cv2.getPerspectiveTransform(pts, dst_pts)
         warped = cv2.warpPerspective(image, matrix, (side, side))
-        
-        # Распознавание цифр
-        self.board = self._recognize_digits(warped)
-        return self.board
+        return warped
     
     def _find_grid_contour(self, contours):
         """
@@ -188,100 +369,165 @@ class SudokuSolver:
         Args:
             grid_image: изображение выпрямленной сетки
             
+        Встроенные бэкенды OCR знают только цифры 1-9: на сетках 16x16
+        и 25x25 клетки с числами больше 9 требуют бэкенда, обученного
+        на этих символах (см. sudoku_ocr.DigitRecognizer).
+        
         Returns:
-            board: матрица 9x9 с распознанными цифрами
+            board: Board с распознанными цифрами
         """
-        board = []
-        cell_size = grid_image.shape[0] // 9
-        
-        for row in range(9):
-            row_data = []
-            for col in range(9):
-                # Извлекаем клетку
-                y1 = row * cell_size
-                y2 = (row + 1) * cell_size
-                x1 = col * cell_size
-                x2 = (col + 1) * cell_size
-                
-                cell = grid_image[y1:y2, x1:x2]
-                
-                # Обработка изображения клетки
-                gray_cell = cv2.cvtColor(cell, cv2.COLOR_BGR2GRAY)
-                _, thresh_cell = cv2.threshold(gray_cell, 150, 255, cv2.THRESH_BINARY)
-                
-                # Находим контуры цифр
-                contours, _ = cv2.findContours(
-                    thresh_cell, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-                )
-                
-                digit = 0
-                if contours:
-                    # Находим наибольший контур (саму цифру)
-                    largest_contour = max(contours, key=cv2.contourArea)
-                    area = cv2.contourArea(largest_contour)
-                    
-                    # Если контур достаточно большой - это цифра
-                    if area > 100:
-                        # Выделяем прямоугольник вокруг цифры
-                        x, y, w, h = cv2.boundingRect(largest_contour)
-                        digit_roi = gray_cell[y:y+h, x:x+w]
-                        
-                        # Масштабируем до стандартного размера
-                        digit_roi = cv2.resize(digit_roi, (28, 28))
-                        
-                        # Распознавание с помощью OCR
-                        text = pytesseract.image_to_string(
-                            digit_roi, config='--psm 10 digits'
-                        ).strip()
-                        
-                        try:
-                            digit = int(text) if text else 0
-                            if digit < 0 or digit > 9:
-                                digit = 0
-                        except ValueError:
-                            digit = 0
-                
-                row_data.append(digit)
-            board.append(row_data)
+        board = Board(size=self.size)
+        self.confidences = [[None] * self.size for _ in range(self.size)]
+        cells = self._extract_digit_rois(grid_image)
+        
+        # Все клетки распознаются одним вызовом бэкенда
+        if self._recognizer is None:
+            self._recognizer = get_recognizer(self.ocr)
+        digits, confidences = self._recognizer.recognize([roi for _, _, roi in cells])
         
+        for (row, col, _), digit, confidence in zip(cells, digits, confidences):
+            board[row, col] = digit
+            self.confidences[row][col] = confidence
         return board
     
+    def _extract_digit_rois(self, grid_image):
+        """
+        Вырезает изображения цифр из непустых клеток сетки.
+        
+        Вся сетка обрабатывается за один проход: один порог, одна
+        разметка связных областей и доля чернил во всех клетках сразу
+        через представление изображения формы (N, cell, N, cell).
+        Пустые клетки отсеиваются здесь и до OCR не доходят.
+        
+        Args:
+            grid_image: изображение выпрямленной сетки
+            
+        Returns:
+            список (row, col, roi) по строкам, roi — цифра 28x28 в оттенках
+            серого с белым полем вокруг
+        """
+        n = self.size
+        cell_size = grid_image.shape[0] // n
+        side = cell_size * n
+        gray = cv2.cvtColor(grid_image[:side, :side], cv2.COLOR_BGR2GRAY)
+        ink = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV,
+            cell_size | 1, 10
+        )
+        
+        # Полосы у краёв клеток — линии сетки: стираем их в маске чернил
+        # и белим в изображении, из которого вырезаются цифры
+        margin = max(1, cell_size // 10)
+        clean = gray.copy()
+        for image, value in ((ink, 0), (clean, 255)):
+            view = image.reshape(n, cell_size, n, cell_size)
+            view[:, :margin] = view[:, -margin:] = value
+            view[..., :margin] = view[..., -margin:] = value
+        
+        # Доля чернил во внутренней части каждой клетки
+        inner = (cell_size - 2 * margin) ** 2
+        density = ink.reshape(n, cell_size, n, cell_size).sum(axis=(1, 3)) / (255.0 * inner)
+        
+        # Одна разметка на всю сетку; область относится к клетке своего центра
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        stats, centroids = stats[1:], centroids[1:]
+        areas = stats[:, cv2.CC_STAT_AREA]
+        cell_of = (
+            np.minimum(centroids[:, 1] // cell_size, n - 1).astype(int) * n
+            + np.minimum(centroids[:, 0] // cell_size, n - 1).astype(int)
+        )
+        
+        # Наибольшая область клетки — цифра; мелкие точки — шум
+        largest = np.zeros(n * n, dtype=np.int64)
+        np.maximum.at(largest, cell_of, areas)
+        digit_cells = (largest >= 0.04 * cell_size ** 2) & (density.reshape(n * n) >= 0.015)
+        
+        # Рамка цифры — объединение заметных областей клетки
+        # (разорванные штрихи дают несколько областей)
+        part = digit_cells[cell_of] & (areas >= 0.2 * largest[cell_of])
+        x0 = np.full(n * n, side)
+        y0 = np.full(n * n, side)
+        x1 = np.zeros(n * n, dtype=np.int64)
+        y1 = np.zeros(n * n, dtype=np.int64)
+        left, top = stats[part, cv2.CC_STAT_LEFT], stats[part, cv2.CC_STAT_TOP]
+        np.minimum.at(x0, cell_of[part], left)
+        np.minimum.at(y0, cell_of[part], top)
+        np.maximum.at(x1, cell_of[part], left + stats[part, cv2.CC_STAT_WIDTH])
+        np.maximum.at(y1, cell_of[part], top + stats[part, cv2.CC_STAT_HEIGHT])
+        
+        # Квадрат вокруг цифры с полем, чтобы она не касалась края
+        pad = max(2, cell_size // 12)
+        canvas = cv2.copyMakeBorder(
+            clean, cell_size, cell_size, cell_size, cell_size,
+            cv2.BORDER_CONSTANT, value=255
+        )
+        cells = []
+        for idx in np.flatnonzero(digit_cells):
+            size = max(x1[idx] - x0[idx], y1[idx] - y0[idx]) + 2 * pad
+            x = (x0[idx] + x1[idx] - size) // 2 + cell_size
+            y = (y0[idx] + y1[idx] - size) // 2 + cell_size
+            roi = canvas[y:y + size, x:x + size]
+            cells.append((idx // n, idx % n, cv2.resize(roi, (28, 28), interpolation=cv2.INTER_AREA)))
+        
+        return cells
+    
     # ========== РЕШЕНИЕ СУДОКУ ==========
     
+    def _board_geometry(self, board):
+        """Геометрия доски: с вариантами решателя или классическая по её размеру"""
+        if self.variants:
+            if len(board) != self.size:
+                raise ValueError(f"Доска {len(board)}x{len(board)} не совпадает "
+                                 f"с вариантом {self.size}x{self.size}")
+            return self.geometry
+        return geometry(len(board))
+    
     def is_valid(self, board, row, col, num):
         """Проверяет, можно ли поместить число в позицию"""
+        g = self._board_geometry(board)
+        cells = flat_cells(board)
+        idx = row * g.size + col
         
-        # Проверка строки
-        if num in board[row]:
-            return False
-        
-        # Проверка столбца
-        if num in [board[i][col] for i in range(9)]:
-            return False
-        
-        # Проверка 3x3 блока
-        box_row, box_col = (row // 3) * 3, (col // 3) * 3
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if board[i][j] == num:
-                    return False
+        # Число не должно повторяться ни в одной группе клетки
+        for peer in g.peers[idx]:
+            if cells[peer] == num:
+                return False
         
+        return self._fits_cages(g, cells, idx, num)
+    
+    @staticmethod
+    def _fits_cages(g, cells, idx, num):
+        """Клетки-суммы клетки idx: с num сумма не превышена, полная сходится"""
+        for cage in g.cages_of[idx]:
+            members, total = g.cages[cage]
+            current = num + sum(cells[other] for other in members if other != idx)
+            if current > total:
+                return False
+            if current != total and all(cells[other] for other in members if other != idx):
+                return False
         return True
     
     def find_empty(self, board):
         """Находит первую пустую клетку (для совместимости)"""
-        for i in range(9):
-            for j in range(9):
+        for i in range(len(board)):
+            for j in range(len(board)):
                 if board[i][j] == 0:
                     return (i, j)
         return None
     
     def get_candidates(self, board, row, col):
         """Возвращает список возможных значений для клетки (для MRV)"""
-        candidates = []
-        for num in range(1, 10):
-            if self.is_valid(board, row, col, num):
-                candidates.append(num)
+        g = self._board_geometry(board)
+        cells = flat_cells(board)
+        idx = row * g.size + col
+        
+        # Один проход по соседям: бит v — число v уже занято (бит 0 — пустые)
+        used = 0
+        for peer in g.peers[idx]:
+            used |= 1 << cells[peer]
+        candidates = [num for num in range(1, g.size + 1) if not used >> num & 1]
+        if g.cages_of[idx]:
+            candidates = [num for num in candidates if self._fits_cages(g, cells, idx, num)]
         return candidates
     
     def find_empty_mrv(self, board):
@@ -290,10 +536,10 @@ class SudokuSolver:
         Это значительно уменьшает дерево поиска.
         """
         best_cell = None
-        min_candidates = 10
+        min_candidates = len(board) + 1
         
-        for i in range(9):
-            for j in range(9):
+        for i in range(len(board)):
+            for j in range(len(board)):
                 if board[i][j] == 0:
                     candidates = self.get_candidates(board, i, j)
                     if len(candidates) < min_candidates:
@@ -306,51 +552,162 @@ class SudokuSolver:
         
         return best_cell
     
-    def solve(self, board=None):
+    def solve(self, board=None, timeout=None, max_nodes=None, cancel=None):
         """
-        Оптимизированный решатель Судоку с эвристиками:
+        Оптимизированный решатель Судоку. Движок "backtrack":
+        - Битовые маски занятости строк/столбцов/блоков (O(1) на ход)
         - Minimum Remaining Values (MRV)
+        - Распространение ограничений до поиска и после каждой догадки
         - Ранний отсев невалидных ветвей
+        Движок "dlx": Algorithm X (Dancing Links) с выбором
+        наименьшего столбца.
+        
+        Доска заполняется на месте только при успешном решении.
+        Поиск проверяет ограничения на каждом узле; при срабатывании
+        возвращается None, а status, abort_reason и частичная
+        статистика доступны через get_statistics(). При workers > 1
+        поддеревья поиска решаются на пуле процессов, первое найденное
+        решение останавливает остальные.
         
         Args:
-            board: матрица Судоку (используется текущая, если не указана)
+            board: Board или матрица N×N (используется текущая, если не указана)
+            timeout: предел времени в секундах (по умолчанию self.timeout)
+            max_nodes: предел узлов поиска (по умолчанию self.max_nodes)
+            cancel: sudoku_engine.CancelToken для отмены из другого потока
             
         Returns:
-            True если решение найдено, False в противном случае
+            True если решение найдено, False если решения нет,
+            None если поиск прерван (предел узлов, таймаут или отмена)
         """
         if board is None:
             board = self.board
+        self.abort_reason = None
+        self.last_nodes = 0
+        start = time.perf_counter()
         
-        # Используем MRV для выбора клетки
-        result = self.find_empty_mrv(board)
+        # Симметричная копия уже решённой головоломки: решение берётся
+        # из кэша и переводится в клетки и цифры этой доски (симметрии
+        # классической доски не сохраняют группы вариантов — без кэша)
+        form = None
+        use_cache = self.solution_cache is not None and not self.variants
+        if use_cache:
+            found, solution, form = self.solution_cache.lookup(board)
+            if found:
+                if solution is not None:
+                    write_cells(board, solution.cells)
+                return self._finish(solution is not None, start)
         
-        if result is None:
-            # Проверяем, является ли это завершением или неудачей
-            empty = self.find_empty(board)
-            if empty is None:
-                return True  # Судоку решена
-            else:
-                return False  # Нет доступных значений — ветка невалидна
+        state = self._create_state(board)
+        if not state.consistent:
+            return self._finish(False, start)  # Исходные цифры противоречат друг другу
         
-        row, col, candidates = result
+        if self.workers and self.workers > 1:
+            from sudoku_parallel import solve_parallel
+            result = solve_parallel(board, self.workers, self._worker_options(),
+                                    self._default(timeout, self.timeout),
+                                    self._default(max_nodes, self.max_nodes), cancel)
+            solved = result["solved"]
+            self.abort_reason = result["abort_reason"]
+            self.solution_steps += result["nodes"]
+            self.last_nodes = result["nodes"]
+            if solved:
+                write_cells(board, result["solution"].cells)
+        else:
+            limits = self._limits(timeout, max_nodes, cancel)
+            try:
+                solved = state.solve(limits)
+            except SearchAborted as error:
+                # Прерванный поиск ничего не доказал: в кэш не записываем
+                self.abort_reason = error.reason
+                solved = None
+            self.solution_steps += state.nodes
+            self.last_nodes = state.nodes
+            if solved:
+                state.write_to(board)
         
-        # Пробуем каждое доступное значение в порядке от 1 до 9
-        for num in candidates:
-            board[row][col] = num
-            self.solution_steps += 1
-            
-            if self.solve(board):
-                return True
+        if solved is not None and use_cache:
+            self.solution_cache.store(form, board if solved else None)
+        return self._finish(solved, start)
+    
+    def _finish(self, solved, start):
+        """Запоминает итог solve и возвращает его"""
+        self.status = "aborted" if solved is None else "solved" if solved else "unsolvable"
+        self.last_time = time.perf_counter() - start
+        return solved
+    
+    @staticmethod
+    def _default(value, default):
+        return default if value is None else value
+    
+    def _limits(self, timeout, max_nodes, cancel):
+        """SearchLimits с учётом значений по умолчанию или None, если ограничений нет"""
+        timeout = self._default(timeout, self.timeout)
+        max_nodes = self._default(max_nodes, self.max_nodes)
+        if timeout is None and max_nodes is None and cancel is None:
+            return None
+        return SearchLimits(max_nodes, timeout, cancel)
+    
+    def _worker_options(self):
+        """Параметры решателя для процессов параллельного поиска"""
+        return {"engine": self.engine, "propagation": self.propagation_names,
+                "size": self.size, "variants": self.variants}
+    
+    def count_solutions(self, board=None, limit=2, max_nodes=None, timeout=None, cancel=None):
+        """
+        Считает решения доски тем же поиском, что и solve, но
+        останавливается, как только найдено limit решений.
+        Доска не изменяется.
+        
+        Args:
+            board: Board или матрица N×N (используется текущая, если не указана)
+            limit: сколько решений достаточно найти
+            max_nodes: предел узлов поиска (по умолчанию self.max_nodes)
+            timeout: предел времени в секундах (по умолчанию self.timeout)
+            cancel: sudoku_engine.CancelToken для отмены из другого потока
             
-            board[row][col] = 0
+        Returns:
+            число решений (не больше limit) или None, если поиск прерван
+            раньше, чем найдено limit решений или исчерпан перебор
+        """
+        if limit < 1:
+            raise ValueError("limit должен быть не меньше 1")
+        if board is None:
+            board = self.board
         
-        return False
+        state = self._create_state(board)
+        if not state.consistent:
+            return 0
+        
+        if self.workers and self.workers > 1:
+            from sudoku_parallel import count_parallel
+            return count_parallel(board, limit, self.workers, self._worker_options(),
+                                  self._default(timeout, self.timeout),
+                                  self._default(max_nodes, self.max_nodes), cancel)
+        return state.count(limit, self._limits(timeout, max_nodes, cancel))
+    
+    def is_unique(self, board=None, max_nodes=None, timeout=None, cancel=None):
+        """
+        Проверяет, что у доски ровно одно решение
+        
+        Returns:
+            True/False или None, если поиск прерван ограничениями
+        """
+        count = self.count_solutions(board, limit=2, max_nodes=max_nodes,
+                                     timeout=timeout, cancel=cancel)
+        return None if count is None else count == 1
+    
+    def _create_state(self, board):
+        """Создаёт состояние поиска выбранного движка для доски"""
+        g = self._board_geometry(board) if self.variants else None
+        if self.engine == "backtrack":
+            return BitmaskState(board, self.propagation, g)
+        return self.ENGINES[self.engine](board, g)
     
     # ========== УТИЛИТЫ ==========
     
     def load_test_board(self):
         """Загружает тестовую доску Судоку"""
-        self.board = [
+        self.board = Board([
             [5, 3, 0, 0, 7, 0, 0, 0, 0],
             [6, 0, 0, 1, 9, 5, 0, 0, 0],
             [0, 9, 8, 0, 0, 0, 0, 6, 0],
@@ -360,7 +717,7 @@ class SudokuSolver:
             [0, 6, 0, 0, 0, 0, 2, 8, 0],
             [0, 0, 0, 4, 1, 9, 0, 0, 5],
             [0, 0, 0, 0, 8, 0, 0, 7, 9]
-        ]
+        ])
         return self.board
     
     def print_board(self, board=None):
@@ -368,25 +725,31 @@ class SudokuSolver:
         if board is None:
             board = self.board
         
-        print("\n" + "=" * 25)
+        box = geometry(len(board)).box
+        width = 2 * len(board) + 2 * box + 1
+        print("\n" + "=" * width)
         for i, row in enumerate(board):
-            if i % 3 == 0 and i != 0:
-                print("-" * 25)
+            if i % box == 0 and i != 0:
+                print("-" * width)
             
             row_str = ""
             for j, num in enumerate(row):
-                if j % 3 == 0 and j != 0:
+                if j % box == 0 and j != 0:
                     row_str += "| "
-                row_str += (str(num) if num != 0 else ".") + " "
+                row_str += (SYMBOLS[num - 1] if num != 0 else ".") + " "
             
             print(row_str)
-        print("=" * 25 + "\n")
+        print("=" * width + "\n")
     
     def get_statistics(self):
         """Возвращает статистику решения"""
         return {
             "steps": self.solution_steps,
-            "filled_cells": sum(1 for row in self.board for cell in row if cell != 0)
+            "filled_cells": 0 if self.board is None else sum(1 for cell in flat_cells(self.board) if cell),
+            "status": self.status,
+            "abort_reason": self.abort_reason,
+            "nodes": self.last_nodes,
+            "time": self.last_time,
         }
 
     def find_conflicts(self, board=None):
@@ -395,57 +758,179 @@ class SudokuSolver:
         Возвращает список словарей с полями: type ('row'/'col'/'box'),
         index (номер строки/столбца/блока), value (повторяющееся число),
         positions (список (r,c) координат).
+
+        Группы вариантов дают свои типы: 'diag' (диагональ), 'region'
+        (область jigsaw вместо блока), 'cage' (повтор в клетке-сумме)
+        и 'sum' (сумма клетки-суммы превышена или не сходится, value —
+        текущая сумма).
         """
         if board is None:
             board = self.board
+        g = self._board_geometry(board)
+        n = g.size
+        cells = flat_cells(board)
+        units = g.units
         conflicts = []
 
-        # Строки
-        for i in range(9):
+        # Один проход по клеткам: маски чисел, уже встреченных в каждой
+        # группе, и повторившихся в ней
+        seen = [0] * len(units)
+        repeated = [0] * len(units)
+        units_of = g.units_of
+        for idx, v in enumerate(cells):
+            if v == 0:
+                continue
+            bit = 1 << v
+            for unit in units_of[idx]:
+                if seen[unit] & bit:
+                    repeated[unit] |= bit
+                else:
+                    seen[unit] |= bit
+
+        # Позиции собираются только для групп с повторами — в порядке
+        # групп (строки, столбцы, блоки, варианты) и клеток группы
+        for unit, mask in enumerate(repeated):
+            if not mask:
+                continue
+            kind, index = g.unit_names[unit]
             counts = {}
-            for j in range(9):
-                v = board[i][j]
-                if v == 0:
-                    continue
-                counts.setdefault(v, []).append((i, j))
+            for idx in units[unit]:
+                v = cells[idx]
+                if mask >> v & 1:
+                    counts.setdefault(v, []).append(divmod(idx, n))
             for val, poses in counts.items():
-                if len(poses) > 1:
-                    conflicts.append({
-                        'type': 'row', 'index': i, 'value': val, 'positions': poses
-                    })
+                conflicts.append({
+                    'type': kind, 'index': index, 'value': val, 'positions': poses
+                })
 
-        # Столбцы
-        for j in range(9):
+        # Клетки-суммы
+        for k, (members, total) in enumerate(g.cages):
             counts = {}
-            for i in range(9):
-                v = board[i][j]
-                if v == 0:
-                    continue
-                counts.setdefault(v, []).append((i, j))
+            for idx in members:
+                if cells[idx]:
+                    counts.setdefault(cells[idx], []).append(divmod(idx, n))
             for val, poses in counts.items():
                 if len(poses) > 1:
                     conflicts.append({
-                        'type': 'col', 'index': j, 'value': val, 'positions': poses
+                        'type': 'cage', 'index': k, 'value': val, 'positions': poses
                     })
-
-        # 3x3 блоки
-        for br in range(3):
-            for bc in range(3):
-                counts = {}
-                for i in range(br * 3, br * 3 + 3):
-                    for j in range(bc * 3, bc * 3 + 3):
-                        v = board[i][j]
-                        if v == 0:
-                            continue
-                        counts.setdefault(v, []).append((i, j))
-                for val, poses in counts.items():
-                    if len(poses) > 1:
-                        conflicts.append({
-                            'type': 'box', 'index': (br, bc), 'value': val, 'positions': poses
-                        })
+            filled = [idx for idx in members if cells[idx]]
+            current = sum(cells[idx] for idx in filled)
+            if current > total or (current != total and len(filled) == len(members)):
+                conflicts.append({
+                    'type': 'sum', 'index': k, 'value': current,
+                    'positions': [divmod(idx, n) for idx in filled]
+                })
 
         return conflicts
 
+    def conflict_tracker(self, board=None):
+        """
+        Трекер конфликтов для правки доски по одной клетке: вместо
+        повторного find_conflicts отдаёт только появившиеся и снятые
+        конфликты (см. sudoku_conflicts.ConflictTracker)
+        """
+        from sudoku_conflicts import ConflictTracker
+        if board is None:
+            board = self.board
+        return ConflictTracker(board, self._board_geometry(board))
+
+
+def _variants(args):
+    """Варианты правил из аргументов командной строки"""
+    variants = [VARIANTS[name]() for name in args.variant]
+    if args.jigsaw:
+        variants.append(Jigsaw(args.jigsaw))
+    return variants
+
+
+def run_batch(args):
+    """
+    Пакетный режим: читает головоломки построчно из файла или stdin
+    (в том числе gzip), решает и пишет решения построчно в --output.
+    Сводка печатается в stderr, чтобы не смешиваться с решениями.
+    """
+    from sudoku_batch import iter_solve
+    from sudoku_io import open_output, read_puzzles, write_solutions
+    
+    log = sys.stderr
+    print(f"\n📚 Пакетное решение: {args.batch} -> {args.output} "
+          f"(процессов: {args.workers or os.cpu_count()})", file=log)
+    
+    total = solved = aborted = invalid = steps = 0
+    failed = []
+    start = time.perf_counter()
+    with open_output(args.output) as out:
+        results = iter_solve(read_puzzles(args.batch), workers=args.workers,
+                             engine=args.engine, solution_cache=args.solution_cache,
+                             timeout=args.timeout, max_nodes=args.max_nodes,
+                             size=args.size, variants=_variants(args))
+        for result in write_solutions(results, out):
+            total += 1
+            steps += result['steps']
+            if result['solved']:
+                solved += 1
+                continue
+            if result['solved'] is None:
+                aborted += 1
+            elif result.get('error'):
+                # Некорректная строка: в выходе пустая строка, поток продолжается
+                if not invalid:
+                    print(f"⚠ Головоломка {result['index']}: {result['error']}", file=log)
+                invalid += 1
+            if len(failed) < 20:
+                failed.append(result['index'])
+    elapsed = time.perf_counter() - start
+    
+    print(f"📈 Статистика:", file=log)
+    print(f"   • Головоломок: {total}", file=log)
+    print(f"   • Решено: {solved}", file=log)
+    if aborted:
+        print(f"   • Прервано по пределу: {aborted}", file=log)
+    if invalid:
+        print(f"   • Некорректных строк: {invalid}", file=log)
+    print(f"   • Шагов решения: {steps}", file=log)
+    print(f"   • Время: {elapsed:.2f} с ({total / elapsed if elapsed else 0:.0f} головоломок/с)", file=log)
+    if failed:
+        print(f"❌ Не решены (номера головоломок с 0): {failed}", file=log)
+
+
+def run_recognition(args):
+    """
+    Пакетное распознавание: обрабатывает папку или glob изображений
+    на пуле процессов и пишет строки «доска<TAB>путь» в --output.
+    Такой файл можно сразу подать в --batch.
+    """
+    from sudoku_batch import recognize_many
+    from sudoku_io import format_board, open_output
+    
+    log = sys.stderr
+    print(f"\n🖼  Пакетное распознавание: {args.images} "
+          f"(процессов: {args.workers or os.cpu_count()})", file=log)
+    
+    total = failed = with_conflicts = 0
+    start = time.perf_counter()
+    with open_output(args.output) as out:
+        for record in recognize_many(args.images, workers=args.workers, ocr=args.ocr,
+                                     cache=args.cache, size=args.size):
+            total += 1
+            timings = record['timings']
+            if record['error']:
+                failed += 1
+                print(f"❌ {record['path']}: {record['error']}", file=log)
+                continue
+            if record['conflicts']:
+                with_conflicts += 1
+            out.write(f"{format_board(record['board'])}\t{record['path']}\n")
+            source = "из кэша" if record['cached'] else f"OCR {timings['ocr']:.2f} с"
+            warning = " ⚠ решение не единственно" if record['unique'] is False else ""
+            print(f"✓ {record['path']}: конфликтов {len(record['conflicts'])}, "
+                  f"{timings['total']:.2f} с ({source}){warning}", file=log)
+    elapsed = time.perf_counter() - start
+    
+    print(f"📈 Изображений: {total}, ошибок: {failed}, с конфликтами: {with_conflicts}, "
+          f"время: {elapsed:.2f} с", file=log)
+
 
 def main():
     """Основная функция программы"""
@@ -453,17 +938,61 @@ def main():
     # Очищаем все кэши перед началом
     gc.collect()
     
+    # Получаем путь к изображению (поддержка аргумента командной строки)
+    parser = argparse.ArgumentParser(description='Sudoku solver with optional image input')
+    parser.add_argument('-i', '--image', help='Путь к изображению Судоку', default=None)
+    parser.add_argument('-e', '--engine', choices=sorted(SudokuSolver.ENGINES),
+                        default='backtrack', help='Движок решения')
+    parser.add_argument('-b', '--batch', default=None,
+                        help="Файл с головоломками по одной строке из 81 (или N²) символа "
+                             "('-' — stdin, поддерживается gzip)")
+    parser.add_argument('--solution-cache', type=int, default=None, metavar='N',
+                        help='Кэш решений на N головоломок: симметричные повторы '
+                             'не решаются заново (в пакетном режиме — на процесс)')
+    parser.add_argument('--timeout', type=float, default=None, metavar='SEC',
+                        help='Предел времени решения одной головоломки в секундах')
+    parser.add_argument('--max-nodes', type=int, default=None, metavar='N',
+                        help='Предел узлов поиска для одной головоломки')
+    parser.add_argument('--size', type=int, choices=SIZES, default=9,
+                        help='Сторона сетки на изображениях (в пакетном решении размер '
+                             'берётся из длины строки: 16, 81, 256 или 625 символов)')
+    parser.add_argument('--variant', choices=sorted(VARIANTS), action='append', default=[],
+                        help='Вариант правил (можно несколько раз): diagonal — обе диагонали')
+    parser.add_argument('--jigsaw', default=None, metavar='LAYOUT',
+                        help='Судоку с фигурными областями: N² меток областей по клеткам '
+                             '(клетки с одной меткой — одна область)')
+    parser.add_argument('--ocr', choices=sorted(RECOGNIZERS), default='batch',
+                        help='Бэкенд распознавания цифр (template — без tesseract)')
+    parser.add_argument('--cache', default=None,
+                        help='Каталог кэша распознавания (по умолчанию кэш выключен)')
+    parser.add_argument('--images', default=None,
+                        help='Папка или glob-шаблон изображений для пакетного распознавания')
+    parser.add_argument('-o', '--output', default='-',
+                        help="Куда писать результаты пакетного режима ('-' — stdout, '.gz' — gzip)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Число процессов для пакетных режимов (по умолчанию — все ядра); '
+                             'для одной головоломки — параллельный поиск по поддеревьям '
+                             '(по умолчанию — в одном процессе)')
+    args = parser.parse_args()
+    if args.engine == 'dlx' and args.size > DLX_MAX_SIZE:
+        parser.error(f"движок dlx поддерживает доски до {DLX_MAX_SIZE}x{DLX_MAX_SIZE}, "
+                     f"используйте --engine backtrack")
+    
+    if args.batch:
+        run_batch(args)
+        return
+    if args.images:
+        run_recognition(args)
+        return
+    
     print("\n" + "=" * 50)
     print("       РЕШАТЕЛЬ СУДОКУ С РАСПОЗНАВАНИЕМ        ")
     print("=" * 50)
     
     # Создаём новый экземпляр решателя
-    solver = SudokuSolver()
-    
-    # Получаем путь к изображению (поддержка аргумента командной строки)
-    parser = argparse.ArgumentParser(description='Sudoku solver with optional image input')
-    parser.add_argument('-i', '--image', help='Путь к изображению Судоку', default=None)
-    args = parser.parse_args()
+    solver = SudokuSolver(engine=args.engine, ocr=args.ocr, cache=args.cache,
+                          timeout=args.timeout, max_nodes=args.max_nodes,
+                          workers=args.workers, size=args.size, variants=_variants(args))
 
     script_dir = Path(__file__).parent
     if args.image:
@@ -513,16 +1042,28 @@ def main():
     if conflicts:
         print("⚠ Найдены явные конфликты в распознанной доске:")
         for c in conflicts:
-            if c['type'] in ('row', 'col'):
-                print(f" - {c['type']} {c['index']}: число {c['value']} повторяется в позициях {c['positions']}")
+            if c['type'] == 'sum':
+                print(f" - cage {c['index']}: сумма {c['value']} не сходится в позициях {c['positions']}")
             else:
-                print(f" - box {c['index']}: число {c['value']} повторяется в позициях {c['positions']}")
+                print(f" - {c['type']} {c['index']}: число {c['value']} повторяется в позициях {c['positions']}")
         print("\n❗ OCR, возможно, ошибся при распознавании. Рекомендую вручную исправить доску или использовать опцию --image с другим файлом.")
         return
     
+    # Несколько решений без конфликтов — обычно OCR пропустил цифру
+    if solver.is_unique(max_nodes=solver.UNIQUENESS_MAX_NODES) is False:
+        print("⚠ У доски больше одного решения: OCR, возможно, пропустил цифру")
+    
+    if not solver.variants:
+        from sudoku_grader import format_trace, grade
+        grading = grade(solver.board)
+        if grading['valid']:
+            print(f"🎓 Сложность: {grading['level']} ({grading['score']:.1f}), "
+                  f"приёмы: {format_trace(grading)}")
+    
     # Решаем
     print("🔄 Решаю Судоку...")
-    if solver.solve():
+    solved = solver.solve()
+    if solved:
         print("\n✅ СУДОКУ РЕШЕНА!")
         print("\n📊 Решённая Судоку:")
         solver.print_board()
@@ -531,6 +1072,10 @@ def main():
         print(f"📈 Статистика:")
         print(f"   • Шагов решения: {stats['steps']}")
         print(f"   • Заполнено клеток: {stats['filled_cells']}")
+    elif solved is None:
+        stats = solver.get_statistics()
+        print(f"\n⏹ Поиск прерван ({stats['abort_reason']}) после {stats['nodes']} узлов "
+              f"за {stats['time']:.2f} с")
     else:
         print("\n❌ Решение не найдено (возможно, некорректная Судоку)")
 
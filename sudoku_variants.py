@@ -0,0 +1,106 @@
+"""
+Варианты Судоку: дополнительные группы ограничений
+
+Вариант — объект с тремя методами, которые Geometry вызывает один раз
+при построении таблиц (базовый класс Variant возвращает «ничего»):
+- regions(size): N областей по N клеток вместо блоков или None
+- units(size): дополнительные группы из N клеток, где каждая цифра
+  стоит ровно один раз
+- cages(size): клетки-суммы [(клетки, сумма)], цифры внутри клетки
+  не повторяются
+
+Клетки задаются номерами 0..N²-1 по строкам. Решатель, проверки
+и поиск работают с готовыми таблицами Geometry, поэтому новый вариант —
+это только новый класс здесь.
+"""
+
+
+class Variant:
+    """Базовый вариант: ничего не добавляет к классической доске"""
+
+    # Тип групп варианта в отчётах о конфликтах
+    kind = None
+
+    def regions(self, size):
+        return None
+
+    def units(self, size):
+        return []
+
+    def cages(self, size):
+        return []
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class Diagonal(Variant):
+    """Диагональное Судоку: обе главные диагонали — группы из N клеток"""
+
+    kind = 'diag'
+
+    def units(self, size):
+        return [
+            tuple(i * size + i for i in range(size)),
+            tuple(i * size + size - 1 - i for i in range(size)),
+        ]
+
+
+class Jigsaw(Variant):
+    """Судоку с фигурными областями вместо блоков"""
+
+    kind = 'region'
+
+    def __init__(self, layout):
+        """
+        Args:
+            layout: метки областей по клеткам — строка из N² символов
+                (пробелы и переводы строк пропускаются) или матрица N×N
+                (строки матрицы могут быть строками); клетки с одной
+                меткой образуют область
+        """
+        if isinstance(layout, str):
+            self.layout = [label for label in layout if not label.isspace()]
+        else:
+            self.layout = [label for row in layout for label in row]
+
+    def regions(self, size):
+        if len(self.layout) != size * size:
+            raise ValueError(f"Разметка областей должна содержать {size * size} клеток, "
+                             f"получено {len(self.layout)}")
+        regions = {}
+        for idx, label in enumerate(self.layout):
+            regions.setdefault(label, []).append(idx)
+        return list(regions.values())
+
+    def __repr__(self):
+        return f"Jigsaw({''.join(map(str, self.layout))!r})"
+
+
+class Killer(Variant):
+    """Судоку-суммы: сумма цифр клетки задана, цифры в ней не повторяются"""
+
+    kind = 'cage'
+
+    def __init__(self, cages):
+        """
+        Args:
+            cages: список (клетки, сумма); клетки — номера 0..N²-1
+                или пары (строка, столбец)
+        """
+        self.sums = [(list(cells), total) for cells, total in cages]
+
+    def cages(self, size):
+        return [
+            ([cell if isinstance(cell, int) else cell[0] * size + cell[1] for cell in cells], total)
+            for cells, total in self.sums
+        ]
+
+    def __repr__(self):
+        return f"Killer({self.sums!r})"
+
+
+# Варианты без параметров по имени (для командной строки)
+VARIANTS = {
+    "diagonal": Diagonal,
+}
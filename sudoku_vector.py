@@ -0,0 +1,181 @@
+"""
+Векторизованное пакетное решение Судоку на NumPy
+
+N досок хранятся массивом (N, 81) uint8, кандидаты — масками (N, 81) uint16.
+Одиночки (naked и hidden singles) применяются ко всем доскам сразу
+операциями NumPy; перебор (SudokuSolver.solve) запускается только для
+тех немногих досок, которые распространением не решаются.
+"""
+
+import numpy as np
+
+from sudoku_board import Board
+from sudoku_engine import PEERS, UNITS
+from sudoku_solver import SudokuSolver
+
+FULL_MASK = 0x1FF
+
+_PEERS = np.array(PEERS, dtype=np.intp)           # (81, 20)
+_UNITS = np.array(UNITS, dtype=np.intp)           # (27, 9)
+_DIGIT_BITS = np.arange(9, dtype=np.uint16)       # сдвиги для цифр 1..9
+_BIT_OF = np.array([0] + [1 << d for d in range(9)], dtype=np.uint16)
+
+# Таблицы по маске: число кандидатов и цифра для масок из одного бита
+_POPCOUNT = np.array([bin(m).count("1") for m in range(1 << 9)], dtype=np.uint8)
+_SINGLE_DIGIT = np.zeros(1 << 9, dtype=np.uint8)
+for _d in range(9):
+    _SINGLE_DIGIT[1 << _d] = _d + 1
+
+# Статусы досок в процессе распространения
+ACTIVE, SOLVED, INVALID = 0, 1, 2
+
+
+def to_array(puzzles):
+    """
+    Преобразует головоломки в массив (N, 81) uint8
+
+    Args:
+        puzzles: строки из 81 символа ('.' или '0' — пусто), Board
+            или матрицы 9x9
+    """
+    boards = np.zeros((len(puzzles), 81), dtype=np.uint8)
+    for n, puzzle in enumerate(puzzles):
+        if isinstance(puzzle, str):
+            raw = puzzle.strip().replace('.', '0').encode('ascii')
+            if len(raw) != 81:
+                raise ValueError(f"Векторный решатель поддерживает только доски 9x9: "
+                                 f"ожидалось 81 символ, получено {len(raw)}")
+            boards[n] = np.frombuffer(raw, dtype=np.uint8) - 48
+        elif len(puzzle) != 9:
+            raise ValueError(f"Векторный решатель поддерживает только доски 9x9, "
+                             f"получено {len(puzzle)}x{len(puzzle)}")
+        elif isinstance(puzzle, Board):
+            boards[n] = np.frombuffer(puzzle.cells, dtype=np.uint8)
+        else:
+            boards[n] = np.asarray(puzzle, dtype=np.uint8).reshape(81)
+    if boards.max(initial=0) > 9:
+        raise ValueError("Недопустимый символ в головоломке")
+    return boards
+
+
+def _candidates(boards):
+    """
+    Считает маски кандидатов и находит противоречивые доски
+
+    Returns:
+        (cand, bits, invalid): маски кандидатов (N, 81) uint16 (0 для
+        заполненных клеток), биты стоящих цифр (N, 81) и булев массив (N,)
+        досок с повторами или клетками без кандидатов
+    """
+    bits = _BIT_OF[boards]
+    peer_bits = np.bitwise_or.reduce(bits[:, _PEERS], axis=2)
+
+    empty = boards == 0
+    cand = np.where(empty, ~peer_bits & FULL_MASK, 0).astype(np.uint16)
+
+    # Повтор цифры среди соседей или пустая клетка без кандидатов
+    duplicate = (bits & peer_bits) != 0
+    dead = empty & (cand == 0)
+    invalid = (duplicate | dead).any(axis=1)
+    return cand, bits, invalid
+
+
+def propagate(boards):
+    """
+    Применяет naked и hidden singles ко всем доскам до неподвижной точки
+
+    Args:
+        boards: массив (N, 81) uint8, изменяется на месте
+
+    Returns:
+        массив статусов (N,): ACTIVE (нужен перебор), SOLVED или INVALID
+    """
+    status = np.full(len(boards), ACTIVE, dtype=np.uint8)
+    active = np.arange(len(boards))
+
+    while len(active):
+        sub = boards[active]
+        cand, bits, invalid = _candidates(sub)
+
+        # Цифре негде стоять в группе — противоречие
+        unit_cand = cand[:, _UNITS]                                    # (n, 27, 9)
+        unit_cover = np.bitwise_or.reduce(unit_cand | bits[:, _UNITS], axis=2)
+        invalid |= (unit_cover != FULL_MASK).any(axis=1)
+
+        solved = ~invalid & (sub != 0).all(axis=1)
+        status[active[invalid]] = INVALID
+        status[active[solved]] = SOLVED
+        keep = ~(invalid | solved)
+        active, sub, cand, unit_cand = active[keep], sub[keep], cand[keep], unit_cand[keep]
+        if not len(active):
+            break
+
+        # Naked singles: у клетки один кандидат
+        naked = _SINGLE_DIGIT[cand]
+        changed = naked != 0
+        sub = np.where(changed, naked, sub)
+
+        # Hidden singles: цифра возможна только в одной клетке группы
+        has = (unit_cand[..., None] >> _DIGIT_BITS) & 1                # (n, 27, 9, 9)
+        single = has.sum(axis=2) == 1                                  # (n, 27, 9)
+        n_idx, unit_idx, digit_idx = np.nonzero(single)
+        if len(n_idx):
+            pos = has[n_idx, unit_idx, :, digit_idx].argmax(axis=1)
+            cells = _UNITS[unit_idx, pos]
+            sub[n_idx, cells] = digit_idx + 1
+            changed[n_idx, cells] = True
+
+        progress = changed.any(axis=1)
+        boards[active] = sub
+        # Досок без изменений распространение больше не продвинет
+        active = active[progress]
+
+    return status
+
+
+def solve_batch(puzzles, block_size=4096, **options):
+    """
+    Решает набор головоломок: векторное распространение блоками
+    по block_size досок и перебор SudokuSolver для оставшихся
+
+    Args:
+        puzzles: строки из 81 символа или матрицы 9x9 (другие размеры
+            не поддерживаются — ValueError)
+        block_size: сколько досок обрабатывать за раз (ограничивает память)
+        **options: параметры SudokuSolver для перебора (engine, propagation)
+
+    Returns:
+        список словарей {index, solved, solution, steps, searched}
+        в порядке входа
+    """
+    puzzles = list(puzzles)
+    results = []
+    solver = None
+
+    for start in range(0, len(puzzles), block_size):
+        boards = to_array(puzzles[start:start + block_size])
+        status = propagate(boards)
+
+        for offset, board_status in enumerate(status):
+            board = boards[offset].reshape(9, 9).tolist()
+            result = {
+                "index": start + offset,
+                "solved": bool(board_status == SOLVED),
+                "solution": board if board_status == SOLVED else None,
+                "steps": 0,
+                "searched": False,
+            }
+            if board_status == ACTIVE:
+                if solver is None:
+                    solver = SudokuSolver(**options)
+                solver.solution_steps = 0
+                solved = solver.solve(board)
+                result.update(
+                    solved=solved,
+                    solution=board if solved else None,
+                    steps=solver.solution_steps,
+                    searched=True,
+                )
+            results.append(result)
+
+    return results
@@ -2,6 +2,8 @@
 """
 Тестовый скрипт для проверки улучшенного распознавания и решения Судоку.
 Демонстрирует устойчивость к разным вариантам захвата изображения.
+Функции test_* проверяют решатель и его подсистемы без изображений
+(pytest или запуск скрипта напрямую).
 """
 
 import sys
@@ -10,6 +12,586 @@ sys.path.insert(0, '/home/mrx/Sudoku')
 from sudoku_solver import SudokuSolver
 import os
 
+import gzip
+import io
+import pickle
+import random
+import tempfile
+
+import cv2
+import numpy as np
+
+from sudoku_batch import iter_solve, recognize_many, solve_many
+from sudoku_benchmark import CONFIGURATIONS, compare, run_config
+from sudoku_board import Board
+from sudoku_cache import RecognitionCache, SolutionCache
+from sudoku_engine import BitmaskState, SearchAborted, SearchLimits
+from sudoku_generator import generate, generate_many, rate
+from sudoku_grader import SEARCH_RATING, TECHNIQUES, grade
+from sudoku_io import read_puzzles, write_solutions
+from sudoku_parallel import SUBPROBLEMS_PER_WORKER, count_parallel, solve_parallel, split_board
+from sudoku_propagation import DEFAULT_STAGES, STAGES, resolve_stages
+from sudoku_variants import Diagonal, Jigsaw, Killer
+from sudoku_vector import solve_batch
+
+
+# Головоломки с единственным решением (в том числе сложные для перебора)
+UNIQUE_PUZZLES = [
+    "53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79",
+    "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+]
+
+# Наборы стадий распространения, которые должны давать одинаковый результат
+STAGE_SETS = [(), ("naked_singles",), DEFAULT_STAGES, tuple(STAGES)]
+
+
+def _solvers(**options):
+    """Решатели со всеми наборами стадий и движок dlx"""
+    solvers = [SudokuSolver(propagation=stages, **options) for stages in STAGE_SETS]
+    solvers.append(SudokuSolver(engine="dlx", **options))
+    return solvers
+
+
+def test_propagation_stages_agree():
+    """Любой набор стадий и dlx дают одно и то же решение"""
+    for puzzle in UNIQUE_PUZZLES:
+        expected = None
+        for solver in _solvers():
+            board = Board(puzzle)
+            assert solver.solve(board) is True
+            assert solver.find_conflicts(board) == []
+            if expected is None:
+                expected = board
+            assert board == expected, (solver.engine, solver.propagation_names)
+    print(f"✓ Стадии распространения согласованы (головоломок: {len(UNIQUE_PUZZLES)})")
+
+
+def _solved(puzzle):
+    """Решение головоломки решателем по умолчанию"""
+    board = Board(puzzle)
+    assert SudokuSolver().solve(board)
+    return board
+
+
+def test_iter_solve():
+    """Пакетное решение: порядок, записи об ошибках, пул процессов"""
+    puzzles = [UNIQUE_PUZZLES[0], "xyz", UNIQUE_PUZZLES[1], "5" * 81]
+    for workers in (1, 2):
+        results = list(iter_solve(puzzles, workers=workers, chunksize=1))
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+        assert [r["status"] for r in results] == ["solved", "invalid", "solved", "unsolvable"]
+        assert results[1]["error"] and results[1]["solution"] is None
+        assert results[3]["error"] is None and results[3]["solved"] is False
+        assert results[0]["solution"] == _solved(UNIQUE_PUZZLES[0])
+
+    unordered = iter_solve(puzzles, workers=2, ordered=False, chunksize=1)
+    assert sorted(r["index"] for r in unordered) == [0, 1, 2, 3]
+    aborted = solve_many([UNIQUE_PUZZLES[1]], workers=1, propagation=(), max_nodes=10)
+    assert aborted[0]["solved"] is None and aborted[0]["abort_reason"] == "nodes"
+    print("✓ iter_solve: порядок входа и записи об ошибках")
+
+
+def test_solve_batch():
+    """Векторный решатель совпадает с обычным и отвергает не 9x9"""
+    puzzles = UNIQUE_PUZZLES + ["5" * 81]
+    results = solve_batch(puzzles, block_size=2)
+    assert [r["index"] for r in results] == list(range(len(puzzles)))
+    for puzzle, result in zip(UNIQUE_PUZZLES, results):
+        assert result["solved"] is True
+        assert Board(result["solution"]) == _solved(puzzle)
+    assert results[-1]["solved"] is False and results[-1]["solution"] is None
+    # Самой сложной головоломке распространения не хватает — нужен перебор
+    assert results[1]["searched"]
+
+    for bad in ("0" * 256, Board("0" * 16)):
+        try:
+            solve_batch([bad])
+        except ValueError:
+            continue
+        raise AssertionError("ожидалась ValueError для доски не 9x9")
+    print("✓ solve_batch совпадает с SudokuSolver")
+
+
+def test_corpus_io():
+    """Чтение gzip-корпуса и выравнивание строк выхода по входу"""
+    lines = ["# top95", UNIQUE_PUZZLES[0] + "\tsource", "", "xyz", UNIQUE_PUZZLES[1]]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.txt")  # gzip по сигнатуре, не по расширению
+        with gzip.open(path, "wt", encoding="ascii") as f:
+            f.write("\n".join(lines) + "\n")
+        puzzles = list(read_puzzles(path))
+    assert puzzles == [UNIQUE_PUZZLES[0], "xyz", UNIQUE_PUZZLES[1]]
+
+    out = io.StringIO()
+    records = list(write_solutions(iter_solve(puzzles, workers=1), out))
+    assert len(records) == 3
+    rows = out.getvalue().split("\n")
+    assert rows == [_solved(UNIQUE_PUZZLES[0]).to_string(), "",
+                    _solved(UNIQUE_PUZZLES[1]).to_string(), ""]
+    print("✓ Корпус: gzip на входе, строка выхода на каждую строку входа")
+
+
+def _render(board, path, cell=60, margin=40):
+    """Рисует доску 9x9 в файл изображения (чёрные цифры на белой сетке)"""
+    side = cell * 9
+    image = np.full((side + 2 * margin, side + 2 * margin, 3), 255, np.uint8)
+    for i in range(10):
+        thickness = 3 if i % 3 == 0 else 1
+        cv2.line(image, (margin, margin + i * cell), (margin + side, margin + i * cell),
+                 (0, 0, 0), thickness)
+        cv2.line(image, (margin + i * cell, margin), (margin + i * cell, margin + side),
+                 (0, 0, 0), thickness)
+    for row in range(9):
+        for col in range(9):
+            if board[row][col]:
+                text = str(board[row][col])
+                (w, h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)
+                cv2.putText(image, text, (margin + col * cell + (cell - w) // 2,
+                                          margin + row * cell + (cell + h) // 2),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3, cv2.LINE_AA)
+    cv2.imwrite(path, image)
+
+
+def test_recognize():
+    """recognize и recognize_many: одни стадии, время и кэш распознавания"""
+    expected = Board(UNIQUE_PUZZLES[0])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "puzzle.png")
+        _render(expected, path)
+        cache = os.path.join(tmp, "cache")
+
+        timings = {}
+        solver = SudokuSolver(ocr="template", cache=cache)
+        assert solver.recognize(path, timings) == expected
+        assert set(timings) == {"decode", "preprocess", "ocr"}
+        assert not solver.last_cached and solver.board is None
+
+        records = list(recognize_many([path], workers=1, ocr="template", cache=cache))
+        assert len(records) == 1 and records[0]["error"] is None
+        assert records[0]["cached"] and Board(records[0]["board"]) == expected
+        assert set(records[0]["timings"]) == {"decode", "total"}
+        assert records[0]["conflicts"] == [] and records[0]["unique"] is True
+    print("✓ recognize: стадии, время и кэш распознавания")
+
+
+def test_recognition_cache():
+    """Кэш распознавания: ключ от параметров, вытеснение давно не читанных"""
+    board = Board(UNIQUE_PUZZLES[0])
+    key = RecognitionCache.key
+    assert key(b"png", {"ocr": "batch"}) != key(b"png", {"ocr": "template"})
+    assert key(b"png", {"ocr": "batch"}) != key(b"jpg", {"ocr": "batch"})
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RecognitionCache(tmp)
+        cache.put("probe", board)
+        entry_size = os.path.getsize(os.path.join(tmp, "probe.json"))
+        cache.clear()
+
+        cache = RecognitionCache(tmp, max_bytes=entry_size * 5 // 2)
+        cache.put("first", board)
+        cache.put("second", board)
+        os.utime(os.path.join(tmp, "first.json"), (1000, 1000))
+        os.utime(os.path.join(tmp, "second.json"), (2000, 2000))
+        # Чтение обновляет время записи: давней становится "second"
+        assert cache.get("first")["board"] == board.to_list()
+        cache.put("third", board)
+        assert len(cache) == 2
+        assert cache.get("second") is None
+        assert cache.get("first") is not None and cache.get("third") is not None
+    print("✓ Кэш распознавания вытесняет давно не читанные записи")
+
+
+def _transform(puzzle):
+    """Симметричная копия: перестановка цифр, строк в полосе, полос и транспонирование"""
+    relabel = {str(d): str(10 - d) for d in range(1, 10)}
+    rows = [puzzle[r * 9:r * 9 + 9] for r in (4, 3, 5, 0, 2, 1, 6, 7, 8)]
+    columns = [''.join(row[c] for row in rows) for c in range(9)]
+    return ''.join(relabel.get(ch, ch) for ch in ''.join(columns))
+
+
+def test_solution_cache():
+    """Кэш решений: симметричная копия получает решение в своих клетках и цифрах"""
+    cache = SolutionCache(10)
+    solver = SudokuSolver(solution_cache=cache)
+    for puzzle in UNIQUE_PUZZLES:
+        assert solver.solve(Board(puzzle))
+    assert (cache.hits, cache.misses) == (0, len(UNIQUE_PUZZLES))
+
+    for puzzle in UNIQUE_PUZZLES:
+        copy = _transform(puzzle)
+        board = Board(copy)
+        assert solver.solve(board)
+        assert board == _solved(copy)
+        assert solver.find_conflicts(board) == []
+    assert cache.hits == len(UNIQUE_PUZZLES)
+
+    # Точный повтор и нерешаемая головоломка тоже берутся из кэша
+    unsolvable = "123456780000000009" + "0" * 63
+    assert solver.solve(Board(UNIQUE_PUZZLES[0])) and solver.solve(Board(unsolvable)) is False
+    assert solver.solve(Board(unsolvable)) is False
+    assert cache.hits == len(UNIQUE_PUZZLES) + 2
+    print("✓ Кэш решений переводит решение в клетки симметричной копии")
+
+
+def test_board():
+    """Board: разбор строк и матриц, круговое преобразование, копии"""
+    puzzle = UNIQUE_PUZZLES[0]
+    board = Board(puzzle)
+    assert board.size == 9 and len(board.cells) == 81
+    assert board.to_string() == puzzle
+    assert Board(puzzle.replace('.', '0')) == board
+    assert Board(board.to_list()) == board == board.to_list()
+    assert board[0, 0] == 5 and list(board[0]) == [5, 3, 0, 0, 7, 0, 0, 0, 0]
+    assert pickle.loads(pickle.dumps(board)) == board
+
+    copy = board.copy()
+    copy[0, 2] = 4
+    assert board[0, 2] == 0 and copy != board
+
+    # 16x16: цифры больше 9 — буквы любого регистра
+    big = Board("G" + "." * 254 + "a")
+    assert big.size == 16 and big[0, 0] == 16 and big[15, 15] == 10
+    assert big.to_string() == "G" + "." * 254 + "A"
+
+    for bad in ("1" * 80, "x" * 81, [[1, 2], [3]], [[5] * 4] * 4):
+        try:
+            Board(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"ожидалась ValueError для {bad!r}")
+    print("✓ Board: разбор и круговое преобразование")
+
+
+# Головоломка с 63 решениями — для подсчёта и разбиения поиска
+MULTI_PUZZLE = "53.......6..195....98......8...6...34....3..17...2.....6.....8....4.9..5....8..79"
+MULTI_COUNT = 63
+
+
+def test_count_solutions():
+    """Подсчёт решений: все движки согласны, limit останавливает поиск"""
+    for solver in _solvers():
+        for puzzle in UNIQUE_PUZZLES:
+            assert solver.count_solutions(Board(puzzle), limit=2) == 1
+            assert solver.is_unique(Board(puzzle)) is True
+        board = Board(MULTI_PUZZLE)
+        assert solver.count_solutions(board, limit=1000) == MULTI_COUNT
+        assert solver.count_solutions(board, limit=5) == 5
+        assert solver.is_unique(board) is False
+        assert board == Board(MULTI_PUZZLE)  # доска не меняется
+        assert solver.count_solutions(Board("5" * 81)) == 0
+
+    # Прерванный подсчёт ничего не доказывает
+    plain = SudokuSolver(propagation=())
+    assert plain.count_solutions(Board(UNIQUE_PUZZLES[1]), max_nodes=10) is None
+    assert plain.is_unique(Board(UNIQUE_PUZZLES[1]), max_nodes=10) is None
+    print(f"✓ Подсчёт решений согласован (у неоднозначной — {MULTI_COUNT})")
+
+
+def test_generator():
+    """Генератор: единственное решение, уровень и воспроизводимость по зерну"""
+    records = list(generate_many(4, workers=1, seed=42, difficulty="easy", chunksize=2))
+    again = list(generate_many(4, workers=2, seed=42, difficulty="easy", chunksize=1))
+    assert [r["puzzle"] for r in records] == [r["puzzle"] for r in again]
+
+    solver = SudokuSolver()
+    for record in records:
+        puzzle = record["puzzle"]
+        assert record["difficulty"] == "easy" == rate(puzzle)
+        assert record["clues"] == sum(1 for num in puzzle.cells if num)
+        assert solver.count_solutions(puzzle, limit=2) == 1
+        assert _solved(puzzle.to_string()) == record["solution"]
+
+    symmetric = generate(7, symmetric=True)["puzzle"]
+    # Центральная симметрия: клетка и её отражение заполнены одновременно
+    assert all(bool(symmetric.cells[i]) == bool(symmetric.cells[80 - i]) for i in range(81))
+    print("✓ Генератор: единственное решение и одинаковый результат при одном зерне")
+
+
+def test_grade():
+    """Оценка сложности: трасса приёмов, перебор и некорректные доски"""
+    easy = grade(UNIQUE_PUZZLES[0])
+    assert easy["valid"] and easy["solved_logically"] and easy["solutions"] == 1
+    assert (easy["hardest"], easy["score"], easy["level"]) == ("hidden_singles", 1.5, "easy")
+    placements = sum(entry["placements"] for entry in easy["techniques"].values())
+    assert placements == UNIQUE_PUZZLES[0].count('.')
+
+    order = [name for name, _ in TECHNIQUES]
+    for puzzle, solutions in ((UNIQUE_PUZZLES[1], 1), (MULTI_PUZZLE, 2)):
+        record = grade(puzzle)
+        assert not record["solved_logically"] and record["hardest"] == "search"
+        assert record["score"] == SEARCH_RATING and record["level"] == "expert"
+        assert record["solutions"] == solutions and record["search_nodes"] > 0
+        used = list(record["techniques"])
+        assert used == sorted(used, key=order.index)
+
+    assert grade("55" + "." * 79)["valid"] is False
+    assert grade(UNIQUE_PUZZLES[1], max_nodes=1)["solutions"] is None
+    print("✓ Оценка сложности по трассе приёмов")
+
+
+def _all_solutions(board, stages=()):
+    """Все решения доски перебором одного состояния (повторные solve)"""
+    state = BitmaskState(board, resolve_stages(stages))
+    solutions = []
+    while state.solve():
+        solutions.append(bytes(state.cells))
+    return solutions
+
+
+def test_resume_after_abort():
+    """Поиск, прерванный по пределу узлов, продолжается с того же узла"""
+    puzzle = UNIQUE_PUZZLES[1]
+    reference = BitmaskState(Board(puzzle))
+    assert reference.solve()
+
+    state = BitmaskState(Board(puzzle))
+    aborts = 0
+    while True:
+        try:
+            solved = state.solve(SearchLimits(max_nodes=state.nodes + 500))
+            break
+        except SearchAborted as error:
+            assert error.reason == "nodes"
+            aborts += 1
+    assert aborts > 0
+    assert solved
+    assert state.cells == reference.cells
+    assert state.nodes == reference.nodes
+    print(f"✓ Поиск продолжен после прерываний: {aborts}, узлов: {state.nodes}")
+
+
+def test_split_disjoint():
+    """Отданные split() ветви и оставшийся поиск не пересекаются"""
+    for stages in ((), DEFAULT_STAGES):
+        state = BitmaskState(Board(MULTI_PUZZLE), resolve_stages(stages))
+        found = []
+        boards = []
+        # Отдаём ветви после каждого решения, пока поиску есть что отдать
+        while state.solve():
+            found.append(bytes(state.cells))
+            boards += state.split()
+        assert len(boards) > 1
+        for board in boards:
+            found += _all_solutions(board, stages)
+
+        assert len(found) == len(set(found)) == MULTI_COUNT
+        assert sorted(found) == sorted(_all_solutions(Board(MULTI_PUZZLE)))
+    print(f"✓ split(): ветви не пересекаются (отдано досок: {len(boards)})")
+
+
+# Головоломка с 51 решением: при раскрытии на 2 процесса одна ветка
+# решается распространением, а на фронте остаются другие подзадачи
+SPLIT_SOLVED_PUZZLE = "..4.78.1.672....48.9.3.2.6....7.....4..8..7..7....48569...3.........9635.4...617."
+SPLIT_SOLVED_COUNT = 51
+
+
+def test_parallel_search():
+    """Параллельный поиск: решение при раскрытии, сумма подсчётов по подзадачам"""
+    options = {"propagation": DEFAULT_STAGES}
+    board = Board(SPLIT_SOLVED_PUZZLE)
+    subproblems, solutions = split_board(board, 2 * SUBPROBLEMS_PER_WORKER,
+                                         resolve_stages(DEFAULT_STAGES))
+    assert subproblems and solutions
+
+    # Решение найдено при раскрытии: пул не запускается, узлов в пуле нет
+    record = solve_parallel(board, 2, options)
+    assert record["solved"] is True and record["nodes"] == 0
+    assert SudokuSolver().find_conflicts(record["solution"]) == []
+    solution = record["solution"].cells
+    assert all(num in (0, solution[i]) for i, num in enumerate(board.cells))
+    assert count_parallel(board, 1, 2, options) == 1
+    assert board == Board(SPLIT_SOLVED_PUZZLE)
+
+    # Подсчёт складывает решения раскрытия и подзадач
+    assert count_parallel(board, 1000, 2, options) == SPLIT_SOLVED_COUNT
+    assert count_parallel(Board(MULTI_PUZZLE), 1000, 2) == MULTI_COUNT
+
+    solver = SudokuSolver(workers=2)
+    hard = Board(UNIQUE_PUZZLES[1])
+    assert solver.solve(hard) and hard == _solved(UNIQUE_PUZZLES[1])
+    assert solver.count_solutions(Board(MULTI_PUZZLE), limit=1000) == MULTI_COUNT
+    print("✓ Параллельный поиск: решение при раскрытии останавливает поиск")
+
+
+def test_sizes():
+    """Доски 4x4, 16x16 и 25x25: решение, подсчёт и ограничение dlx"""
+    tiny = Board("1..." "..2." ".3.." "...4")
+    for solver in (SudokuSolver(), SudokuSolver(engine="dlx")):
+        board = Board(tiny)
+        assert solver.solve(board) and solver.find_conflicts(board) == []
+        assert solver.count_solutions(Board("0" * 16), limit=1000) == 288
+
+    # 16x16: решённая пустая доска без половины цифр (по диагоналям)
+    grid = Board("0" * 256)
+    assert SudokuSolver().solve(grid)
+    assert SudokuSolver().find_conflicts(grid) == []
+    puzzle = Board(grid)
+    for idx in range(256):
+        if (idx // 16 + idx % 16) % 2:
+            puzzle.cells[idx] = 0
+    for solver in (SudokuSolver(), SudokuSolver(engine="dlx"), SudokuSolver(propagation=())):
+        board = Board(puzzle)
+        assert solver.solve(board)
+        assert solver.find_conflicts(board) == []
+        assert all(num in (0, board.cells[i]) for i, num in enumerate(puzzle.cells))
+
+    assert Board("0" * 625).size == 25
+    try:
+        SudokuSolver(engine="dlx", size=25)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("dlx не должен принимать доски 25x25")
+    record = solve_many(["0" * 625], workers=1, engine="dlx")[0]
+    assert record["status"] == "invalid" and record["error"]
+    print("✓ Доски 4x4 и 16x16 решаются, dlx отвергает 25x25")
+
+
+# Фигурные области: полосы по три строки, внутри полосы блоки сдвинуты
+# на строку вправо
+JIGSAW_LAYOUT = ''.join(
+    str(row // 3 * 3 + (col + row % 3) // 3 % 3) for row in range(9) for col in range(9)
+)
+
+
+def _check_variant_solution(board, puzzle, variants):
+    """Решение не противоречит правилам варианта и сохраняет подсказки"""
+    assert SudokuSolver(variants=variants).find_conflicts(board) == []
+    assert all(num in (0, board.cells[i]) for i, num in enumerate(puzzle.cells))
+    assert all(board.cells)
+
+
+def test_variants():
+    """Диагонали, jigsaw и killer: движки согласованы, клетки-суммы соблюдены"""
+    diagonal = [Diagonal()]
+    grid = Board("0" * 81)
+    assert SudokuSolver(variants=diagonal).solve(grid)
+    assert {grid[i, i] for i in range(9)} == set(range(1, 10))
+    assert {grid[i, 8 - i] for i in range(9)} == set(range(1, 10))
+    puzzle = Board(grid)
+    for idx in range(0, 81, 2):
+        puzzle.cells[idx] = 0
+    counts = {(solver.engine, solver.propagation_names):
+              solver.count_solutions(Board(puzzle), limit=1000)
+              for solver in _solvers(variants=diagonal)}
+    assert len(set(counts.values())) == 1, counts
+    assert min(counts.values()) >= 1
+    # Диагонали только сужают классическую головоломку
+    assert SudokuSolver().count_solutions(Board(puzzle), limit=1000) >= min(counts.values())
+
+    jigsaw = [Jigsaw(JIGSAW_LAYOUT)]
+    grid = Board("0" * 81)
+    assert SudokuSolver(variants=jigsaw).solve(grid)
+    regions = {}
+    for idx, label in enumerate(JIGSAW_LAYOUT):
+        regions.setdefault(label, set()).add(grid.cells[idx])
+    assert all(digits == set(range(1, 10)) for digits in regions.values())
+    puzzle = Board(grid)
+    for idx in range(0, 81, 2):
+        puzzle.cells[idx] = 0
+    for solver in _solvers(variants=jigsaw):
+        board = Board(puzzle)
+        assert solver.solve(board)
+        _check_variant_solution(board, puzzle, jigsaw)
+
+    # Killer: пары соседних клеток строки с суммами из решённой сетки
+    solution = _solved(UNIQUE_PUZZLES[0])
+    cages = [([idx, idx + 1], solution.cells[idx] + solution.cells[idx + 1])
+             for idx in range(0, 81, 9)]
+    corner = [(4, 4), (4, 5), (5, 5)]
+    corner_sum = sum(solution[row, col] for row, col in corner)
+    puzzle = Board(UNIQUE_PUZZLES[0])
+    for idx in range(0, 81, 9):
+        puzzle.cells[idx] = 0
+
+    # Сумма, которая не сходится с единственным решением, — решения нет
+    board = Board(puzzle)
+    wrong = [Killer(cages + [(corner, corner_sum + 1)])]
+    assert SudokuSolver(variants=wrong).solve(board) is False
+    killer = [Killer(cages + [(corner, corner_sum)])]
+    assert SudokuSolver(variants=killer).solve(board) and board == solution
+    _check_variant_solution(board, puzzle, killer)
+
+    board[0, 0] = board[0, 0] % 9 + 1
+    conflicts = SudokuSolver(variants=killer).find_conflicts(board)
+    assert 'sum' in {conflict['type'] for conflict in conflicts}
+    try:
+        SudokuSolver(engine="dlx", variants=killer)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("dlx не должен принимать клетки-суммы")
+    print("✓ Варианты: диагонали, jigsaw и killer")
+
+
+def test_conflict_tracker():
+    """ConflictTracker совпадает с find_conflicts после случайных правок"""
+    rng = random.Random(7)
+    cages = [([0, 1, 2], 15), ([40, 41], 9), ([80, 70, 60], 12)]
+    for variants in ([], [Diagonal()], [Killer(cages), Diagonal()]):
+        solver = SudokuSolver(variants=variants)
+        board = Board(bytes(rng.randint(1, 9) if rng.random() < 0.3 else 0
+                            for _ in range(81)))
+        tracker = solver.conflict_tracker(board)
+        assert tracker.conflicts == solver.find_conflicts(board)
+
+        for _ in range(1000):
+            row, col = rng.randrange(9), rng.randrange(9)
+            num = rng.choice([0, 0] + list(range(1, 10)))
+            before = solver.find_conflicts(board)
+            added, removed = tracker.set(row, col, num)
+            board[row, col] = num
+            after = solver.find_conflicts(board)
+
+            assert tracker.conflicts == after
+            assert all(c in after for c in added)
+            assert all(c in before for c in removed)
+            assert all(c in added for c in after if c not in before)
+            assert all(c in removed for c in before if c not in after)
+            assert tracker.cells_in_conflict() == {
+                pos for c in after for pos in c['positions']}
+    print("✓ ConflictTracker совпадает с find_conflicts")
+
+
+def _bench_result(corpus, config, per_sec, p95, nodes):
+    """Запись прогона бенчмарка с нужными для compare полями"""
+    return {"corpus": corpus, "config": config, "puzzles_per_sec": per_sec,
+            "latency": {"p95": p95}, "nodes": {"mean": nodes}}
+
+
+def test_benchmark_compare():
+    """Сравнение с базовым прогоном: узлы всегда, время — по --time-tolerance"""
+    baseline = {"results": [_bench_result("top", "backtrack", 300.0, 0.010, 40.0),
+                            _bench_result("top", "dlx", 100.0, 0.030, 90.0)]}
+    # В 3 раза медленнее при тех же узлах
+    slow = {"results": [_bench_result("top", "backtrack", 100.0, 0.030, 40.0),
+                        _bench_result("top", "dlx", 100.0, 0.030, 90.0),
+                        _bench_result("easy", "dlx", 1.0, 1.0, 1.0)]}
+    regressions, timings = compare(slow, baseline)
+    assert regressions == []
+    assert {(t["config"], t["metric"]) for t in timings} == {
+        ("backtrack", "puzzles_per_sec"), ("backtrack", "latency_p95"),
+        ("dlx", "puzzles_per_sec"), ("dlx", "latency_p95")}
+
+    regressions, _ = compare(slow, baseline, time_tolerance=0.5)
+    assert {(r["config"], r["metric"]) for r in regressions} == {
+        ("backtrack", "puzzles_per_sec"), ("backtrack", "latency_p95")}
+    # Ускорение регрессией не считается
+    regressions, _ = compare(baseline, slow, time_tolerance=0.5)
+    assert regressions == []
+
+    more_nodes = {"results": [_bench_result("top", "dlx", 100.0, 0.030, 91.0)]}
+    regressions, _ = compare(more_nodes, baseline)
+    assert [(r["metric"], r["baseline"], r["current"]) for r in regressions] == [
+        ("nodes_mean", 90.0, 91.0)]
+    assert compare(more_nodes, baseline, tolerance=0.05)[0] == []
+
+    metrics = run_config(UNIQUE_PUZZLES, CONFIGURATIONS["backtrack"])
+    assert metrics["wrong"] == 0 and metrics["aborted"] == 0
+    assert metrics["puzzles_per_sec"] > 0 and metrics["nodes"]["mean"] >= 0
+    print("✓ Бенчмарк: узлы — всегда, время — по допуску")
+
+
 # Список тестовых сценариев (если вы добавите разные скриншоты)
 test_images = [
     '/home/mrx/Sudoku/sudoku.png',
@@ -62,3 +644,24 @@ for img_path in test_images:
 print("\n" + "="*60)
 print("Тестирование завершено")
 print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    test_propagation_stages_agree()
+    test_iter_solve()
+    test_solve_batch()
+    test_corpus_io()
+    test_recognize()
+    test_recognition_cache()
+    test_solution_cache()
+    test_board()
+    test_count_solutions()
+    test_generator()
+    test_grade()
+    test_resume_after_abort()
+    test_split_disjoint()
+    test_parallel_search()
+    test_sizes()
+    test_variants()
+    test_conflict_tracker()
+    test_benchmark_compare()